@@ -1,30 +1,73 @@
 import asyncio
-import base64
+import atexit
+import functools
 import json
+import logging
 import os
 import re
-import shutil
+import tempfile
 import time
 import uuid
 import zipfile
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Set
+
+try:
+    import pybase64 as base64  # SIMD-accelerated, drop-in for the stdlib module
+except ImportError:
+    import base64
 
 from fastapi import APIRouter, Request
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 
 from app.schemas.plan import OrchestrationPlan
-from app.services.junior_dev import implement_component
+from app.core.config import settings
+from app.services.junior_dev import implement_files
 from app.services.orchestrator import process_chat
 from app.services.agent_loop import run_orchestration_with_feedback
+from app.services.response_cache import zip_response_cache
+from app.services.workspace import (
+    PROCESS_GROUP_KWARGS,
+    TEMPLATE_ROOT,
+    TEMPLATE_SKIP_DIRS,
+    TEMPLATE_SKIP_SUFFIXES,
+    fast_copytree,
+    kill_process_tree,
+    walk_scandir,
+    write_file,
+)
+
+logger = logging.getLogger(__name__)
+
+# Resolved once at import instead of walking the parent chain on every request
+_TEMPLATE_SOURCE = TEMPLATE_ROOT
+_BUILD_ROOT = Path(__file__).resolve().parents[3] / "persistent_builds"
+if not _TEMPLATE_SOURCE.exists():
+    logger.error("Template source not found at %s; /instructions requests will fail", _TEMPLATE_SOURCE)
+
+# Process-wide pool for blocking filesystem work (template copy, file writes, zipping),
+# reused across requests so none of it runs on the event loop.
+_io_executor = ThreadPoolExecutor(
+    max_workers=settings.IO_EXECUTOR_WORKERS,
+    thread_name_prefix="instructions-io",
+)
+atexit.register(_io_executor.shutdown, wait=False)
+
+# Dev-server banner line, matched on raw bytes to skip decoding every line
+_LOCAL_URL_RE = re.compile(rb"(http://localhost:\d+)")
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks = set()
+
+# Dev servers started by build_and_start. They run in their own process group (so
+# their vite/node children can be killed together) and therefore don't receive the
+# backend's Ctrl-C; stop_dev_servers kills them on application shutdown.
+_dev_servers: Set[asyncio.subprocess.Process] = set()
 
 router = APIRouter()
 
-def _run_implement_component(file_plan, global_style, session_id):
-    """Helper function to run async implement_component in a thread."""
-    return asyncio.run(implement_component(file_plan, global_style, session_id))
-
 # async def test_endpoint(request: TestRequest):
 #     """
 #     Test endpoint that prints received data and returns a response
@@ -71,15 +114,16 @@ def _run_implement_component(file_plan, global_style, session_id):
 async def build_and_start(project_path: str) -> str:
     """Build existing React project and deploy to Netlify"""
      # 1️⃣ Install dependencies
-    print("Installing dependencies...")
+    logger.info("Installing dependencies...")
     install = await asyncio.create_subprocess_exec(
         "npm", "install",
         cwd=project_path,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE
     )
-    await install.wait()
-    print("✅ npm install complete")
+    # communicate() drains both pipes; wait() alone can deadlock on a full pipe
+    await install.communicate()
+    logger.info("npm install complete")
 
     # 2️⃣ Read package.json to determine run script
     package_json_path = os.path.join(project_path, "package.json")
@@ -96,70 +140,165 @@ async def build_and_start(project_path: str) -> str:
     else:
         raise Exception("No dev or start script found in package.json.")
 
-    print(f"Using script: npm run {run_script}")
+    logger.info("Using script: npm run %s", run_script)
 
-    # 3️⃣ Run local dev server
+    # 3️⃣ Run local dev server (stderr folded into stdout so a single reader drains both)
     process = await asyncio.create_subprocess_exec(
         "npm", "run", run_script,
         cwd=project_path,
         stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
+        stderr=asyncio.subprocess.STDOUT,
+        **PROCESS_GROUP_KWARGS,
     )
+    _dev_servers.add(process)
 
-    url_regex = re.compile(r"(http://localhost:\d+)")
-    url_found = None
-
-    print("Waiting for local server to start...")
+    logger.info("Waiting for local server to start...")
+    debug_output = logger.isEnabledFor(logging.DEBUG)
 
     # 4️⃣ Read output in real time until we detect URL
-    while True:
-        line = await process.stdout.readline()
-        if not line:
-            break
+    try:
+        async with asyncio.timeout(settings.DEV_SERVER_START_TIMEOUT):
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                if debug_output:
+                    logger.debug("%s", line.decode("utf-8", "replace").rstrip())
+
+                match = _LOCAL_URL_RE.search(line)
+                if match:
+                    url_found = match.group(1).decode("ascii")
+                    logger.info("Found local URL: %s", url_found)
+                    # Keep reading the server's output in the background so a full
+                    # pipe never blocks it after we stop listening.
+                    drain_task = asyncio.create_task(_drain_stream(process.stdout))
+                    _background_tasks.add(drain_task)
+                    drain_task.add_done_callback(_background_tasks.discard)
+                    return url_found  # return immediately
+    except TimeoutError:
+        # npm's child (vite/node) would otherwise keep serving and holding the port
+        _dev_servers.discard(process)
+        await kill_process_tree(process)
+        raise Exception(
+            f"Dev server did not report a URL within {settings.DEV_SERVER_START_TIMEOUT:g}s."
+        )
 
-        decoded = line.decode("utf-8").strip()
-        print(decoded)
+    raise Exception("Could not detect local development URL.")
 
-        match = url_regex.search(decoded)
-        if match:
-            url_found = match.group(1)
-            print(f"🎉 Found local URL: {url_found}")
-            return url_found  # return immediately
 
-    raise Exception("Could not detect local development URL.")
+async def stop_dev_servers() -> None:
+    """Kill every dev server started by this process, with its children."""
+    servers = list(_dev_servers)
+    _dev_servers.clear()
+    await asyncio.gather(*(kill_process_tree(process) for process in servers))
+
+
+async def _drain_stream(stream: asyncio.StreamReader) -> None:
+    """Discard a subprocess stream until EOF."""
+    while await stream.read(65536):
+        pass
+
+
+# Already-compressed formats gain nothing from DEFLATE, so they are stored as-is
+_COMPRESSED_EXTS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico",
+    ".woff", ".woff2", ".mp4", ".webm", ".zip", ".gz",
+})
+
+async def _run_with_timeouts(coros, timeout: float) -> list:
+    """
+    Run coroutines concurrently in a TaskGroup, bounding each by `timeout` seconds.
+
+    A task that times out yields a TimeoutError in its slot (like gather's
+    return_exceptions) so the other files still complete. Any other exception
+    cancels the remaining tasks and propagates as an ExceptionGroup, as does
+    cancellation of the request itself.
+    """
+    async def _bounded(coro):
+        try:
+            async with asyncio.timeout(timeout):
+                return await coro
+        except TimeoutError:
+            return TimeoutError(f"Timed out after {timeout:g}s")
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(_bounded(coro)) for coro in coros]
+    return [task.result() for task in tasks]
+
+
+def _make_dirs(dirs) -> None:
+    """Create each directory once; callers pass a de-duplicated set."""
+    for directory in sorted(dirs):
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            # Surfaces as a per-file write error for the files in this directory
+            pass
+
+
+def _build_zip(zip_path: Path, template_source: Path, generated_files: dict) -> int:
+    """
+    Zip the template and overlay the generated files; returns the number of entries.
+
+    Zips straight from the pristine template and writes generated files from memory,
+    rather than re-reading the workspace copy (which npm has been writing into).
+    """
+    file_count = 0
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for entry, arcname in walk_scandir(str(template_source), TEMPLATE_SKIP_DIRS):
+            if entry.name.endswith(TEMPLATE_SKIP_SUFFIXES) or arcname in generated_files:
+                continue
+            if os.path.splitext(entry.name)[1].lower() in _COMPRESSED_EXTS:
+                zipf.write(entry.path, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zipf.write(entry.path, arcname)
+            file_count += 1
+
+        for arcname, content in generated_files.items():
+            zipf.writestr(arcname, content)
+            file_count += 1
+    return file_count
 
 
 async def _write_plan_to_zip(plan: OrchestrationPlan, implementations: List[dict], session_id: str) -> FileResponse:
     """
     Copy the frontend template, write implementations, optionally build, and return a zip file.
     """
-    print("[process_instructions] Step 4: Preparing build workspace...")
-    template_source = Path(__file__).resolve().parent.parent.parent.parent / "frontend_template"
-    build_root = Path(__file__).resolve().parent.parent.parent.parent / "persistent_builds"
+    logger.info("[process_instructions] Step 4: Preparing build workspace...")
+    template_source = _TEMPLATE_SOURCE
+    build_root = _BUILD_ROOT
     build_root.mkdir(parents=True, exist_ok=True)
     build_dir = build_root / f"build_{int(time.time())}_{uuid.uuid4().hex[:8]}"
     template_dest = build_dir / "template"
-    print(f"[process_instructions] Template source: {template_source}")
-    print(f"[process_instructions] Template destination: {template_dest}")
+    logger.debug("[process_instructions] Template source: %s", template_source)
+    logger.debug("[process_instructions] Template destination: %s", template_dest)
 
     if not template_source.exists():
         raise FileNotFoundError(f"Template source not found at {template_source}")
 
-    print("[process_instructions] Copying template directory...")
     template_dest.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copytree(
-        template_source,
-        template_dest,
-        ignore=shutil.ignore_patterns('node_modules', '__pycache__', '*.pyc', '.git')
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        _io_executor,
+        functools.partial(
+            fast_copytree,
+            template_source,
+            template_dest,
+            skip_dirs=TEMPLATE_SKIP_DIRS,
+            skip_suffixes=TEMPLATE_SKIP_SUFFIXES,
+        ),
     )
-    print(f"[process_instructions] Template copied successfully to {template_dest}")
+    logger.debug("[process_instructions] Template copied to %s", template_dest)
 
-    print("[process_instructions] Step 5: Processing agent implementations...")
+    logger.info("[process_instructions] Step 5: Processing agent implementations...")
     errors = []
     successful_files = []
+    # Archive path -> generated content, overlaid on the template when zipping
+    generated_files = {}
+    file_plans_by_name = {fp.filename: fp for fp in reversed(plan.files)}  # first plan wins on duplicates
+    pending_writes = []
 
     for idx, impl_result in enumerate(implementations):
-        print(f"[process_instructions] Processing implementation {idx+1}/{len(implementations)}")
 
         if isinstance(impl_result, Exception):
             errors.append({
@@ -191,7 +330,7 @@ async def _write_plan_to_zip(plan: OrchestrationPlan, implementations: List[dict
 
         filename = impl_result.get("filename")
         content = impl_result.get("content", "")
-        print(f"[process_instructions]   Processing file: {filename} ({len(content)} chars)")
+        logger.debug("[process_instructions]   Processing file: %s (%d chars)", filename, len(content))
 
         if not filename:
             errors.append({
@@ -200,7 +339,7 @@ async def _write_plan_to_zip(plan: OrchestrationPlan, implementations: List[dict
             })
             continue
 
-        file_plan = next((fp for fp in plan.files if fp.filename == filename), None)
+        file_plan = file_plans_by_name.get(filename)
         if not file_plan:
             errors.append({
                 "filename": filename,
@@ -208,57 +347,58 @@ async def _write_plan_to_zip(plan: OrchestrationPlan, implementations: List[dict
             })
             continue
 
-        file_path = template_dest / file_plan.path / filename
-        print(f"[process_instructions]   Writing file to: {file_path}")
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        pending_writes.append((filename, file_plan, content, template_dest / file_plan.path / filename))
 
-        try:
-            file_path.write_text(content, encoding='utf-8')
-            successful_files.append(filename)
-            print(f"[process_instructions]   ✓ Successfully wrote {filename}")
-        except Exception as e:
-            print(f"[process_instructions]   ✗ Failed to write {filename}: {str(e)}")
+    # Many files share a directory (e.g. src/components), so mkdir each one once
+    created_dirs = {file_path.parent for _, _, _, file_path in pending_writes}
+    await loop.run_in_executor(_io_executor, _make_dirs, created_dirs)
+
+    # Writes are independent, so overlap them on the shared I/O pool
+    write_results = await asyncio.gather(
+        *(loop.run_in_executor(_io_executor, write_file, file_path, content) for _, _, content, file_path in pending_writes),
+        return_exceptions=True,
+    )
+    for (filename, file_plan, content, file_path), write_result in zip(pending_writes, write_results):
+        if isinstance(write_result, Exception):
+            logger.warning("[process_instructions]   Failed to write %s: %s", filename, write_result)
             errors.append({
                 "filename": filename,
-                "error": f"Failed to write file: {str(e)}"
+                "error": f"Failed to write file: {str(write_result)}"
             })
+            continue
+        successful_files.append(filename)
+        generated_files[(Path(file_plan.path) / filename).as_posix()] = content
+        logger.debug("[process_instructions]   Wrote %s", file_path)
 
     local_url = None
-    print("🏗️ Starting build and start process...")
+    logger.info("[process_instructions] Starting build and start process...")
     try:
         local_url = await build_and_start(str(template_dest))
-        print(f"✅ Local URL obtained: {local_url}")
+        logger.info("[process_instructions] Local URL obtained: %s", local_url)
     except Exception as e:
-        print(f"❌ Build and start failed: {e}")
+        logger.warning("[process_instructions] Build and start failed: %s", e)
 
-    print(f"[process_instructions] File writing completed - {len(successful_files)} successful, {len(errors)} errors")
+    logger.info("[process_instructions] File writing completed - %d successful, %d errors", len(successful_files), len(errors))
 
-    print("[process_instructions] Step 6: Creating zip file...")
-    zip_path = build_dir / "template.zip"
-    print(f"[process_instructions] Zip file path: {zip_path}")
+    # The zip only lives until it has been sent; the build dir stays behind for the dev server
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp_zip:
+        zip_path = Path(tmp_zip.name)
+    logger.info("[process_instructions] Step 6: Creating zip file at %s", zip_path)
 
-    file_count = 0
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(template_dest):
-            dirs[:] = [d for d in dirs if d not in ['node_modules', '__pycache__', '.git']]
-            for file in files:
-                file_path = Path(root) / file
-                arcname = file_path.relative_to(template_dest)
-                zipf.write(file_path, arcname)
-                file_count += 1
-                if file_count % 10 == 0:
-                    print(f"[process_instructions]   Added {file_count} files to zip...")
-
-    print(f"[process_instructions] Zip file created with {file_count} files")
-
-    print("[process_instructions] Step 7: Preparing zip file response...")
-    print(f"[process_instructions] Zip file ready at: {zip_path}")
-    print(f"[process_instructions] Returning FileResponse - {len(successful_files)} successful, {len(errors)} errors")
+    file_count = await loop.run_in_executor(
+        _io_executor, _build_zip, zip_path, template_source, generated_files
+    )
+
+    logger.info("[process_instructions] Zip file created with %d files", file_count)
+    logger.info("[process_instructions] Returning FileResponse - %d successful, %d errors", len(successful_files), len(errors))
 
     return FileResponse(
         path=str(zip_path),
         filename="template.zip",
         media_type="application/zip",
+        # Known up front, so Starlette skips its own threaded stat before sending
+        stat_result=os.stat(zip_path),
+        background=BackgroundTask(os.unlink, zip_path),
         headers={
             "X-Successful-Files": str(len(successful_files)),
             "X-Failed-Files": str(len(errors)),
@@ -266,6 +406,39 @@ async def _write_plan_to_zip(plan: OrchestrationPlan, implementations: List[dict
         }
     )
 
+async def _encode_image(idx: int, image_file) -> Optional[dict]:
+    """Read one uploaded image and base64-encode it off the event loop."""
+    if not hasattr(image_file, 'read'):
+        # Handle string file paths if needed
+        return None
+    try:
+        image_content = await image_file.read()
+        mime_type = image_file.content_type or "image/jpeg"
+        loop = asyncio.get_running_loop()
+        image_base64 = await loop.run_in_executor(_io_executor, _b64encode_str, image_content)
+    except Exception as e:
+        logger.warning("[process_instructions]   ERROR processing image %d: %s", idx + 1, e)
+        # Continue with other images even if one fails
+        return None
+    filename = getattr(image_file, 'filename', f'image_{idx}')
+    logger.debug("[process_instructions]   Image %d: %s, type: %s, size: %d bytes", idx + 1, filename, mime_type, len(image_content))
+    return {
+        "mime_type": mime_type,
+        "data": image_base64
+    }
+
+
+def _b64encode_str(content: bytes) -> str:
+    return base64.b64encode(content).decode('ascii')
+
+
+async def _maybe_cache(cache_key: Optional[str], response: FileResponse) -> FileResponse:
+    """Store a fully successful zip response in the response cache."""
+    if cache_key is None or response.headers.get("X-Failed-Files") != "0":
+        return response
+    return await zip_response_cache.store(cache_key, response)
+
+
 @router.post("/process")
 async def process_instructions(request: Request):
     """
@@ -295,7 +468,7 @@ async def process_instructions(request: Request):
         except AssertionError as e:
             # Usually means python-multipart is missing
             error_msg = f"Multipart parsing failed: {str(e)}. Ensure 'python-multipart' is installed."
-            print(f"[process_instructions] {error_msg}")
+            logger.error("[process_instructions] %s", error_msg)
             return {
                 "type": "error",
                 "content": error_msg,
@@ -303,7 +476,7 @@ async def process_instructions(request: Request):
             }
         except Exception as e:
             error_msg = f"Multipart parsing failed: {str(e)}"
-            print(f"[process_instructions] {error_msg}")
+            logger.error("[process_instructions] %s", error_msg)
             return {
                 "type": "error",
                 "content": error_msg,
@@ -324,36 +497,19 @@ async def process_instructions(request: Request):
         # Handle images from form data
         image_files = form.getlist("images")
         if not image_files:
-            print("IMAGES ", image_files)
             # Try single file upload
             image_file = form.get("images")
             if image_file and hasattr(image_file, 'read'):
                 image_files = [image_file]
         
         if image_files:
-            print(f"[process_instructions] Processing {len(image_files)} image(s)...")
-            for idx, image_file in enumerate(image_files):
-                try:
-                    # Read image content
-                    if hasattr(image_file, 'read'):
-                        image_content = await image_file.read()
-                        mime_type = image_file.content_type or "image/jpeg"
-                    else:
-                        # Handle string file paths if needed
-                        continue
-                    
-                    # Convert to base64
-                    image_base64 = base64.b64encode(image_content).decode('utf-8')
-                    image_data_list.append({
-                        "mime_type": mime_type,
-                        "data": image_base64
-                    })
-                    filename = getattr(image_file, 'filename', f'image_{idx}')
-                    print(f"[process_instructions]   Image {idx+1}: {filename}, type: {mime_type}, size: {len(image_content)} bytes")
-                except Exception as e:
-                    print(f"[process_instructions]   ERROR processing image {idx+1}: {str(e)}")
-                    # Continue with other images even if one fails
-            print(f"[process_instructions] Successfully processed {len(image_data_list)} image(s)")
+            logger.info("[process_instructions] Processing %d image(s)...", len(image_files))
+            # Read and encode all uploads concurrently, keeping their original order
+            encoded_images = await asyncio.gather(
+                *(_encode_image(idx, image_file) for idx, image_file in enumerate(image_files))
+            )
+            image_data_list = [image for image in encoded_images if image is not None]
+            logger.info("[process_instructions] Successfully processed %d image(s)", len(image_data_list))
     
     # Handle JSON requests (backward compatible)
     elif "application/json" in content_type:
@@ -367,7 +523,7 @@ async def process_instructions(request: Request):
             except (TypeError, ValueError):
                 max_rounds = max_rounds
         except Exception as e:
-            print(f"[process_instructions] Error parsing JSON body: {str(e)}")
+            logger.error("[process_instructions] Error parsing JSON body: %s", e)
             return {
                 "type": "error",
                 "content": f"Invalid JSON body: {str(e)}",
@@ -382,19 +538,29 @@ async def process_instructions(request: Request):
             "session_id": session_id
         }
     
-    print(f"[process_instructions] Starting - session_id: {session_id}")
-    print(f"[process_instructions] Instructions received: {instructions[:100]}...")
+    logger.info("[process_instructions] Starting - session_id: %s", session_id)
+    logger.debug("[process_instructions] Instructions received: %.100s...", instructions)
+
+    # Identical stateless requests reuse the previously generated zip; a session_id
+    # carries orchestrator history, so those requests are always regenerated.
+    cache_key = None
+    if zip_response_cache.enabled and not session_id:
+        cache_key = zip_response_cache.make_key(instructions, feedback_loop, max_rounds, image_data_list)
+        cached_response = await zip_response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info("[process_instructions] Serving cached zip for identical request")
+            return cached_response
 
     try:
         if feedback_loop:
-            print("[process_instructions] Running feedback loop flow...")
+            logger.info("[process_instructions] Running feedback loop flow...")
             loop_result = await run_orchestration_with_feedback(
                 instructions,
                 max_rounds=max_rounds,
                 orchestrator_session=session_id,
                 images=image_data_list if image_data_list else None,
             )
-            print("[process_instructions] Feedback loop completed")
+            logger.info("[process_instructions] Feedback loop completed")
             if loop_result.get("type") != "feedback_loop":
                 return loop_result
 
@@ -410,73 +576,56 @@ async def process_instructions(request: Request):
 
             plan = plan_data if isinstance(plan_data, OrchestrationPlan) else OrchestrationPlan(**plan_data)
             implementations = impl_results.get("implementations", [])
-            return await _write_plan_to_zip(plan, implementations, session_id or str(uuid.uuid4()))
+            response = await _write_plan_to_zip(plan, implementations, session_id or str(uuid.uuid4()))
+            if loop_result.get("status") != "completed":
+                # Build never passed (or never ran); a retry should regenerate, not replay this zip
+                return response
+            return await _maybe_cache(cache_key, response)
 
         # Step 1: Get orchestration plan (with images if provided)
-        print("[process_instructions] Step 1: Calling orchestrator to get plan...")
+        logger.info("[process_instructions] Step 1: Calling orchestrator to get plan...")
         result = await process_chat(instructions, session_id, images=image_data_list if image_data_list else None)
-        print(f"[process_instructions] Orchestrator result type: {result.get('type')}")
-        print(f"[process_instructions] Orchestrator result: {result}")
+        logger.info("[process_instructions] Orchestrator result type: %s", result.get("type"))
+        logger.debug("[process_instructions] Orchestrator result: %s", result)
         
         # If we got an error or question, return it as before
         if result.get("type") != "plan":
-            print(f"[process_instructions] Early return - type: {result.get('type')}")
+            logger.info("[process_instructions] Early return - type: %s", result.get("type"))
             return result
         
         # Step 2: Extract the plan
-        print("[process_instructions] Step 2: Extracting orchestration plan...")
         plan: OrchestrationPlan = result.get("content")
         if not plan or not plan.files:
-            print("[process_instructions] ERROR: No files in plan")
+            logger.error("[process_instructions] No files in plan")
             return {
                 "type": "error",
                 "content": "No files to implement in the plan",
                 "session_id": session_id
             }
         
-        print(f"[process_instructions] Plan extracted - {len(plan.files)} files to implement")
+        logger.info("[process_instructions] Plan extracted - %d files to implement", len(plan.files))
         for idx, file_plan in enumerate(plan.files):
-            print(f"[process_instructions]   File {idx+1}: {file_plan.filename} at {file_plan.path}")
-        
-        # Step 3: Call multiple junior_dev agents in parallel with separate session_ids
-        print("[process_instructions] Step 3: Creating parallel implementation tasks...")
+            logger.debug("[process_instructions]   File %d: %s at %s", idx + 1, file_plan.filename, file_plan.path)
         
-        # Generate unique session_id (pure UUID) for each file implementation
-        file_plans_with_sessions = [
-            (file_plan, str(uuid.uuid4()))  # Unique UUID session_id for each
-            for file_plan in plan.files
-        ]
-        print(f"[process_instructions] Created {len(file_plans_with_sessions)} parallel tasks with separate session_ids")
-        
-        # Execute in truly parallel threads - wrap blocking API calls in threads
-        print("[process_instructions] Executing parallel agent calls in threads...")
-        loop = asyncio.get_event_loop()
-        
-        # Create a ThreadPoolExecutor for true parallel execution
+        # Step 3: Call multiple junior_dev agents in parallel, each file (or batch of
+        # small files) under its own session beneath one junior session for this request
+        logger.info("[process_instructions] Step 3: Executing junior dev calls for %d files...", len(plan.files))
         global_style_dict = (
             plan.global_style.model_dump() if plan.global_style else None
         )
-        with ThreadPoolExecutor(max_workers=len(file_plans_with_sessions)) as executor:
-            # Run each blocking API call in a separate thread
-            implementation_tasks = [
-                loop.run_in_executor(
-                    executor,
-                    _run_implement_component,
-                    file_plan,
-                    global_style_dict,
-                    session_id
-                )
-                for file_plan, session_id in file_plans_with_sessions
-            ]
-            implementations = await asyncio.gather(*implementation_tasks, return_exceptions=True)
+        implementations, _ = await implement_files(
+            plan.files,
+            global_style_dict,
+            str(uuid.uuid4()),
+            run_all=functools.partial(_run_with_timeouts, timeout=settings.JUNIOR_DEV_TIMEOUT),
+        )
         
-        print(f"[process_instructions] Parallel execution completed - {len(implementations)} results received")
-        return await _write_plan_to_zip(plan, implementations, session_id or str(uuid.uuid4()))
+        logger.info("[process_instructions] Parallel execution completed - %d results received", len(implementations))
+        response = await _write_plan_to_zip(plan, implementations, session_id or str(uuid.uuid4()))
+        return await _maybe_cache(cache_key, response)
     
     except Exception as e:
-        print(f"[process_instructions] EXCEPTION: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[process_instructions] Unexpected error: %s", e)
         return {
             "type": "error",
             "content": f"Unexpected error: {str(e)}",
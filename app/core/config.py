@@ -1,4 +1,6 @@
 import os
+from functools import cached_property, lru_cache
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,11 +8,56 @@ load_dotenv()
 class Settings:
     PROJECT_NAME: str = "LauzHack API"
     API_V1_STR: str = "/api/v1"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
     # Model configurations
     ORCHESTRATOR_MODEL: str = os.getenv("ORCHESTRATOR_MODEL", "gemini-3-pro-preview")
     JUNIOR_DEV_MODEL: str = os.getenv("JUNIOR_DEV_MODEL", "Qwen/Qwen3-Coder-480B-A35B-Instruct-FP8")
 
+    # Maximum number of junior dev API calls in flight at once
+    JUNIOR_DEV_CONCURRENCY: int = int(os.getenv("JUNIOR_DEV_CONCURRENCY", "6"))
+    # Seconds before a single junior dev task is abandoned
+    JUNIOR_DEV_TIMEOUT: float = float(os.getenv("JUNIOR_DEV_TIMEOUT", "180"))
+    # Junior dev transcripts kept in memory: session count, idle seconds, turns per
+    # session (0 turns keeps no history)
+    JUNIOR_SESSION_MAX: int = int(os.getenv("JUNIOR_SESSION_MAX", "1000"))
+    JUNIOR_SESSION_TTL: float = float(os.getenv("JUNIOR_SESSION_TTL", "3600"))
+    JUNIOR_SESSION_MAX_TURNS: int = int(os.getenv("JUNIOR_SESSION_MAX_TURNS", "6"))
+    # Characters of each junior reply kept in session history (0 keeps full replies)
+    JUNIOR_SESSION_REPLY_CHARS: int = int(os.getenv("JUNIOR_SESSION_REPLY_CHARS", "400"))
+    # Junior dev replies kept for identical prompts (0 disables the cache)
+    JUNIOR_DEV_CACHE_SIZE: int = int(os.getenv("JUNIOR_DEV_CACHE_SIZE", "512"))
+    # Stream junior dev replies instead of waiting for one complete response body
+    JUNIOR_DEV_STREAM: bool = os.getenv("JUNIOR_DEV_STREAM", "false").lower() in ("1", "true", "yes", "on")
+    # Upper bound on a junior dev reply's max_tokens; each request gets a budget
+    # scaled to its file plan (functions, dependencies, routes; at least 4096), and a reply truncated at that budget
+    # is retried once at this limit
+    JUNIOR_DEV_MAX_TOKENS: int = int(os.getenv("JUNIOR_DEV_MAX_TOKENS", "8000"))
+    # Junior dev requests per minute, spaced evenly (0 disables the throttle)
+    JUNIOR_DEV_RPM: float = float(os.getenv("JUNIOR_DEV_RPM", "0"))
+    # Retries (exponential backoff, honoring Retry-After) for 429/5xx/connection errors
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    # Cancel a feedback round's in-flight junior calls once one returns blocking feedback
+    CANCEL_JUNIORS_ON_BLOCKING: bool = os.getenv("CANCEL_JUNIORS_ON_BLOCKING", "true").lower() in ("1", "true", "yes", "on")
+    # Max planned files packed into one junior dev request; batches also stay within
+    # JUNIOR_DEV_MAX_TOKENS combined (1 disables batching)
+    JUNIOR_DEV_BATCH_SIZE: int = int(os.getenv("JUNIOR_DEV_BATCH_SIZE", "1"))
+
+    # Worker threads for blocking filesystem work in the request path
+    IO_EXECUTOR_WORKERS: int = int(os.getenv("IO_EXECUTOR_WORKERS", "16"))
+
+    # Seconds before a single npm install / build / tsc run in the build check is killed
+    BUILD_CHECK_TIMEOUT: float = float(os.getenv("BUILD_CHECK_TIMEOUT", "300"))
+    # Gate feedback-loop rounds on `tsc -b` and only run the full vite build once types pass
+    FAST_TYPECHECK: bool = os.getenv("FAST_TYPECHECK", "false").lower() in ("1", "true", "yes", "on")
+
+    # Seconds to wait for the generated project's dev server to print its URL
+    DEV_SERVER_START_TIMEOUT: float = float(os.getenv("DEV_SERVER_START_TIMEOUT", "60"))
+
+    # Cache of generated zips for repeated identical requests (0 disables)
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "32"))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
     # Base URLs for API endpoints
     ORCHESTRATOR_BASE_URL: str = os.getenv("ORCHESTRATOR_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/")
     JUNIOR_DEV_BASE_URL: str = os.getenv("JUNIOR_DEV_BASE_URL", "https://api.together.xyz/v1")
@@ -20,22 +67,36 @@ class Settings:
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
-    def get_orchestrator_api_key(self) -> str:
-        """Get the appropriate API key for the orchestrator based on base URL."""
-        if "generativelanguage.googleapis.com" in self.ORCHESTRATOR_BASE_URL:
+    def _api_key_for(self, base_url: str) -> str:
+        """Pick the provider API key matching a base URL."""
+        if "generativelanguage.googleapis.com" in base_url:
             return self.GEMINI_API_KEY
-        elif "api.together.xyz" in self.ORCHESTRATOR_BASE_URL:
+        elif "api.together.xyz" in base_url:
             return self.TOGETHER_API_KEY
         else:
             return self.OPENAI_API_KEY
 
+    @cached_property
+    def orchestrator_api_key(self) -> str:
+        return self._api_key_for(self.ORCHESTRATOR_BASE_URL)
+
+    @cached_property
+    def junior_dev_api_key(self) -> str:
+        return self._api_key_for(self.JUNIOR_DEV_BASE_URL)
+
+    def get_orchestrator_api_key(self) -> str:
+        """Get the appropriate API key for the orchestrator based on base URL."""
+        return self.orchestrator_api_key
+
     def get_junior_dev_api_key(self) -> str:
         """Get the appropriate API key for junior dev based on base URL."""
-        if "generativelanguage.googleapis.com" in self.JUNIOR_DEV_BASE_URL:
-            return self.GEMINI_API_KEY
-        elif "api.together.xyz" in self.JUNIOR_DEV_BASE_URL:
-            return self.TOGETHER_API_KEY
-        else:
-            return self.OPENAI_API_KEY
+        return self.junior_dev_api_key
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once per process; env vars are only read at import time."""
+    return Settings()
+
 
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,38 @@
+from typing import Dict
+
+import httpx
+import openai
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled client per LLM base URL, shared by every request in the process
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client for an LLM base URL, creating it on first use.
+
+    Keep-alive connections are reused across all parallel calls to the same
+    provider, and HTTP/2 multiplexes them over one TCP/TLS connection when the
+    optional `h2` package is installed.
+    """
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        client = openai.DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        _clients[base_url] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close all shared HTTP clients (called on application shutdown)."""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
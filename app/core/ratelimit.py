@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Async context manager that admits at most `rate` entries per `period` seconds.
+
+    Entries are spaced evenly (period / rate apart) so a burst of parallel calls is
+    smoothed out before it reaches the provider, instead of tripping its
+    requests-per-minute limit and being retried.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self._interval = period / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return False
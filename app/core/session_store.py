@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class SessionStore:
+    """
+    Bounded in-memory store of chat transcripts keyed by session id.
+
+    Keeps at most `max_sessions` sessions (least recently read or written are
+    dropped first), expires sessions untouched for `ttl_seconds`, and keeps only
+    the last `max_turns` user/assistant turns of each transcript (none with
+    max_turns <= 0), so a long-running server doesn't accumulate every generated
+    file it has ever produced.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_turns: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+
+    def get(self, session_id: str, default: Optional[List[Dict[str, str]]] = None):
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return default
+        touched_at, messages = entry
+        now = time.monotonic()
+        if now - touched_at > self.ttl_seconds:
+            del self._entries[session_id]
+            return default
+        # A read counts as activity for both the idle TTL and LRU order
+        self._entries[session_id] = (now, messages)
+        self._entries.move_to_end(session_id)
+        return messages
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> List[Dict[str, str]]:
+        messages = self.get(session_id)
+        if messages is None:
+            raise KeyError(session_id)
+        return messages
+
+    def __setitem__(self, session_id: str, messages: List[Dict[str, str]]) -> None:
+        self._entries[session_id] = (time.monotonic(), messages)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+    def __delitem__(self, session_id: str) -> None:
+        del self._entries[session_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every session whose id starts with prefix; returns how many were removed."""
+        doomed = [session_id for session_id in self._entries if session_id.startswith(prefix)]
+        for session_id in doomed:
+            del self._entries[session_id]
+        return len(doomed)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def append_turn(self, session_id: str, user_content: str, assistant_content: str) -> None:
+        """Record one request/reply pair, trimming the transcript to the last max_turns."""
+        if self.max_turns <= 0:
+            # History disabled; `del messages[:-0]` would keep everything
+            self._entries.pop(session_id, None)
+            return
+        messages = self.get(session_id, [])
+        messages.append({"role": "user", "content": user_content})
+        messages.append({"role": "assistant", "content": assistant_content})
+        del messages[:-2 * self.max_turns]
+        self[session_id] = messages
@@ -1,11 +1,38 @@
+import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.endpoints import instructions
 from app.core.config import settings
+from app.core.http import close_http_clients
+
+# Request-path logging only enqueues records; a listener thread applies the full
+# format and does the stream writes, so the event loop never blocks on stderr.
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=settings.LOG_LEVEL.upper(), handlers=[_queue_handler])
+_log_listener.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Dev servers run in their own process group and would outlive the backend
+    await instructions.stop_dev_servers()
+    # Release pooled LLM connections on shutdown
+    await close_http_clients()
+    _log_listener.stop()
 
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -1,126 +1,171 @@
 import asyncio
+import hashlib
+import json
 import os
+import re
 import shutil
-import subprocess
-import tempfile
 import uuid
-from concurrent.futures import ThreadPoolExecutor
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from app.core.config import settings
 from app.services import orchestrator, junior_dev
+from app.services.workspace import TEMPLATE_ROOT, build_workspace
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks: Set[asyncio.Task] = set()
 
 
 def _summarize_feedback(impl_results: Dict[str, Any], plan_files: List[Any]) -> List[Dict[str, Any]]:
-    feedback_items: List[Dict[str, Any]] = []
+    feedback_items: List[Dict[str, Any]] = [
+        impl for impl in impl_results.get("implementations", []) if impl.get("type") == "feedback"
+    ]
+    feedback_items.extend(
+        {
+            "type": "feedback",
+            "filename": err.get("filename", "unknown"),
+            "message": err.get("error", "Unknown error"),
+            "blocking": True,
+        }
+        for err in impl_results.get("errors", [])
+    )
 
-    for impl in impl_results.get("implementations", []):
-        if impl.get("type") == "feedback":
-            feedback_items.append(impl)
+    # Sort key is computed once per item; unplanned filenames go last (stable)
+    filename_order = dict(zip(map(attrgetter("filename"), plan_files), range(len(plan_files))))
+    unplanned = len(filename_order)
+    feedback_items.sort(key=lambda item: filename_order.get(item.get("filename", ""), unplanned))
+    return feedback_items
 
-    for err in impl_results.get("errors", []):
-        feedback_items.append(
-            {
-                "type": "feedback",
-                "filename": err.get("filename", "unknown"),
-                "message": err.get("error", "Unknown error"),
-                "blocking": True,
-            }
+
+# tsc diagnostics, e.g. "src/pages/Foo.tsx(12,5): error TS2322: Type 'x' is not ..."
+_TSC_ERROR_RE = re.compile(r"^(?P<file>[^\s(][^(]*)\((?P<line>\d+),(?P<col>\d+)\): error (?P<code>TS\d+): (?P<msg>.*)$", re.M)
+_MAX_ERRORS_PER_FILE = 10
+
+
+def _summarize_build_errors(build_log: str) -> List[Dict[str, Any]]:
+    """
+    Turn a failed build log into feedback items, one per file with tsc errors,
+    so the orchestrator sees where each error is. Falls back to a single
+    truncated "build" item when the log has no recognizable tsc diagnostics.
+    """
+    errors_by_file: Dict[str, List[str]] = {}
+    for match in _TSC_ERROR_RE.finditer(build_log):
+        errors_by_file.setdefault(os.path.basename(match["file"]), []).append(
+            f"line {match['line']}: {match['code']} {match['msg'].strip()}"
         )
 
-    filename_order = {fp.filename: idx for idx, fp in enumerate(plan_files)}
-    feedback_items.sort(key=lambda item: filename_order.get(item.get("filename", ""), 999))
-    return feedback_items
+    if not errors_by_file:
+        return [{"type": "feedback", "filename": "build", "message": build_log[:2000], "blocking": True}]
 
+    return [
+        {
+            "type": "feedback",
+            "filename": filename,
+            "message": "; ".join(errors[:_MAX_ERRORS_PER_FILE]),
+            "blocking": True,
+        }
+        for filename, errors in errors_by_file.items()
+    ]
 
-def _build_feedback_instructions(base_instructions: str, round_index: int, feedback_items: List[Dict[str, Any]], build_error: Optional[str] = None) -> str:
-    feedback_lines = []
-    for item in feedback_items:
-        line = f"- {item.get('filename', 'unknown')}: {item.get('message', '').strip()}"
-        if item.get("blocking"):
-            line += " (blocking)"
-        feedback_lines.append(line)
 
+def _build_feedback_instructions(round_index: int, feedback_items: List[Dict[str, Any]], build_error: Optional[str] = None) -> str:
+    """
+    Build the next round's orchestrator message. Only the feedback delta is sent:
+    the base instructions are already in the orchestrator session history, so
+    resending them would grow every round's prompt and break the stable prefix
+    providers cache.
+    """
+    feedback_lines = [
+        f"- {item.get('filename', 'unknown')}: {item.get('message', '').strip()}"
+        f"{' (blocking)' if item.get('blocking') else ''}"
+        for item in feedback_items
+    ]
     if build_error:
         feedback_lines.append(f"- build: {build_error} (blocking)")
 
     feedback_block = "\n".join(feedback_lines) if feedback_lines else "No feedback."
 
     return (
-        f"{base_instructions}\n\n"
         f"Feedback summary (round {round_index + 1}):\n"
         f"{feedback_block}\n\n"
         "Revise the plan to address the above feedback. Keep already-implemented files stable unless a blocking issue requires changes."
     )
 
 
-def _run_build_check(file_plans: Dict[str, Any], implementations: Dict[str, str]) -> Tuple[bool, str]:
+async def _run_build_check(
+    file_plans: Dict[str, Any], implementations: Dict[str, str], typecheck_only: bool = False
+) -> Tuple[bool, str]:
     """
-    Write all implementations into a temp template copy and run npm install + npm run build.
+    Write all implementations into the warm build workspace and run npm run build,
+    or just `tsc -b` with typecheck_only (npm install only runs when the workspace
+    is new or its manifests changed).
     """
     if not shutil.which("npm"):
         return True, "npm not available in environment; build check skipped."
 
-    template_root = Path(__file__).parent.parent / "frontend_template"
-    if not template_root.exists():
-        return False, f"Template source missing at {template_root}"
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp_path = Path(tmpdir)
-        dest = tmp_path / "project"
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            subprocess.run(
-                ["cp", "-R", str(template_root), str(dest)],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        except subprocess.CalledProcessError as e:
-            return False, f"Template copy failed: {e.stderr or e.stdout}"
-
-        for filename, content in implementations.items():
-            plan = file_plans.get(filename)
-            if not plan:
-                return False, f"No plan info for {filename}"
-            file_path = dest / plan["path"] / filename
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(content, encoding="utf-8")
-
-        env = {"PATH": os.environ.get("PATH", ""), **os.environ}
-        try:
-            install_proc = subprocess.run(
-                ["npm", "install", "--silent"],
-                cwd=dest,
-                check=True,
-                capture_output=True,
-                text=True,
-                env=env,
-            )
-            build_proc = subprocess.run(
-                ["npm", "run", "build"],
-                cwd=dest,
-                check=True,
-                capture_output=True,
-                text=True,
-                env=env,
-            )
-            return True, build_proc.stdout
-        except subprocess.CalledProcessError as e:
-            combined = f"{e.stdout}\n{e.stderr}"
-            return False, combined.strip()
+    if not TEMPLATE_ROOT.exists():
+        return False, f"Template source missing at {TEMPLATE_ROOT}"
+
+    return await build_workspace.run_build(file_plans, implementations, typecheck_only=typecheck_only)
+
+
+def _plan_key(file_plan, style_json: str) -> str:
+    """Hash a file plan entry together with the global style it is implemented under."""
+    payload = json.dumps(file_plan.model_dump(), sort_keys=True) + style_json
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
 
 
-async def _run_juniors_parallel(file_plans, global_style, session_map: Dict[str, str]):
-    loop = asyncio.get_event_loop()
+def _is_blocking_feedback(task: asyncio.Task) -> bool:
+    if task.cancelled() or task.exception() is not None:
+        return False
+    result = task.result()
+    return isinstance(result, dict) and result.get("type") == "feedback" and bool(result.get("blocking"))
+
+
+async def _run_juniors_parallel(
+    file_plans,
+    global_style,
+    session_map: Dict[str, str],
+    completion_keys: Dict[str, str],
+    cancel_on_blocking: bool = False,
+):
+    """
+    Run one junior call per file plan and return results in plan order (exceptions
+    in place, like gather's return_exceptions). The reply cache key of each
+    implementation is recorded in completion_keys by filename. With
+    cancel_on_blocking, the calls still in flight are cancelled as soon as one
+    junior returns blocking feedback, since the round will be re-planned anyway;
+    their slots hold CancelledError.
+    """
+
+    async def implement(fp, sid):
+        result, cache_key = await junior_dev.implement_component_with_cache_key(fp, global_style, sid)
+        if cache_key:
+            completion_keys[fp.filename] = cache_key
+        return result
+
+    # Junior calls are coroutines on this loop; concurrency is capped by junior_dev_semaphore
     tasks = []
-    with ThreadPoolExecutor(max_workers=len(file_plans)) as executor:
-        for fp in file_plans:
-            sid = session_map.setdefault(fp.filename, str(uuid.uuid4()))
-            tasks.append(
-                loop.run_in_executor(None, lambda plan=fp, sid=sid: asyncio.run(junior_dev.implement_component(plan, global_style, sid)))
-            )
+    for fp in file_plans:
+        sid = session_map.setdefault(fp.filename, str(uuid.uuid4()))
+        tasks.append(
+            asyncio.create_task(asyncio.wait_for(implement(fp, sid), timeout=settings.JUNIOR_DEV_TIMEOUT))
+        )
+
+    try:
+        if cancel_on_blocking:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if any(_is_blocking_feedback(task) for task in done):
+                    for task in pending:
+                        task.cancel()
+                    break
         return await asyncio.gather(*tasks, return_exceptions=True)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
 
 
 async def run_orchestration_with_feedback(
@@ -139,6 +184,16 @@ async def run_orchestration_with_feedback(
     file_plan_map: Dict[str, Any] = {}
     implementation_map: Dict[str, str] = {}
     junior_session_map: Dict[str, str] = {}
+    implementation_cache: Dict[str, Dict[str, Any]] = {}
+    # Plan key -> junior reply cache key of the implementation cached under it
+    completion_keys: Dict[str, str] = {}
+
+    if shutil.which("npm") and TEMPLATE_ROOT.exists():
+        # The first npm install is the slowest step of the loop; run it while the
+        # orchestrator and juniors work instead of after them
+        warm_task = asyncio.create_task(build_workspace.warm_up())
+        _background_tasks.add(warm_task)
+        warm_task.add_done_callback(_background_tasks.discard)
 
     for round_index in range(max_rounds):
         plan_result = await orchestrator.process_chat(
@@ -156,12 +211,43 @@ async def run_orchestration_with_feedback(
             file_plan_map[fp.filename] = fp.model_dump()
 
         global_style = plan.global_style.model_dump() if plan.global_style else None
-        impl_results_list = await _run_juniors_parallel(plan.files, global_style, junior_session_map)
+        # Files whose plan entry and style are unchanged since an earlier round reuse
+        # that round's implementation instead of another junior call
+        style_json = json.dumps(global_style, sort_keys=True)
+        plan_keys = [_plan_key(fp, style_json) for fp in plan.files]
+        pending_files = [fp for fp, key in zip(plan.files, plan_keys) if key not in implementation_cache]
+        # Cancelled files are only retried by a later round, so never cancel on the last one
+        round_completion_keys: Dict[str, str] = {}
+        fresh_results = iter(
+            await _run_juniors_parallel(
+                pending_files, global_style, junior_session_map, round_completion_keys,
+                cancel_on_blocking=settings.CANCEL_JUNIORS_ON_BLOCKING and round_index < max_rounds - 1,
+            )
+        )
+        impl_results_list = [
+            implementation_cache[key] if key in implementation_cache else next(fresh_results)
+            for key in plan_keys
+        ]
+        for fp, key, impl in zip(plan.files, plan_keys, impl_results_list):
+            if isinstance(impl, dict) and impl.get("type") == "implementation":
+                implementation_cache[key] = impl
+                if fp.filename in round_completion_keys:
+                    completion_keys[key] = round_completion_keys[fp.filename]
 
         impl_results = {"implementations": [], "errors": []}
-        for impl in impl_results_list:
+        cancelled_files = set()
+        for fp, impl in zip(plan.files, impl_results_list):
+            if isinstance(impl, asyncio.CancelledError):
+                # Stopped early because another file blocked; retried next round, not an error
+                cancelled_files.add(fp.filename)
+                continue
+            if isinstance(impl, asyncio.TimeoutError):
+                impl_results["errors"].append(
+                    {"filename": fp.filename, "error": f"Timed out after {settings.JUNIOR_DEV_TIMEOUT:g}s"}
+                )
+                continue
             if isinstance(impl, Exception):
-                impl_results["errors"].append({"filename": "unknown", "error": str(impl)})
+                impl_results["errors"].append({"filename": fp.filename, "error": str(impl)})
                 continue
             impl_results["implementations"].append(impl)
             if impl.get("type") == "implementation":
@@ -170,7 +256,9 @@ async def run_orchestration_with_feedback(
         feedback_items = _summarize_feedback(impl_results, plan.files)
         iterations.append(
             {
-                "plan": plan.model_dump(),
+                # The validated model itself: the endpoint zips it directly, and FastAPI
+                # serializes it only if the loop result is returned as JSON
+                "plan": plan,
                 "implementations": impl_results,
                 "feedback": feedback_items,
             }
@@ -178,7 +266,8 @@ async def run_orchestration_with_feedback(
 
         blocking = any(item.get("blocking") for item in feedback_items)
         missing_files = [
-            fp.filename for fp in plan.files if fp.filename not in implementation_map
+            fp.filename for fp in plan.files
+            if fp.filename not in implementation_map and fp.filename not in cancelled_files
         ]
         if missing_files:
             blocking = True
@@ -191,8 +280,14 @@ async def run_orchestration_with_feedback(
                 }
             )
 
+        build_error_items: List[Dict[str, Any]] = []
         if not blocking and impl_results.get("failed", 0) == 0:
-            build_ok, build_log = _run_build_check(file_plan_map, implementation_map)
+            build_ok, build_log = True, ""
+            if settings.FAST_TYPECHECK:
+                # Cheap incremental type check first; the full bundle only runs once types pass
+                build_ok, build_log = await _run_build_check(file_plan_map, implementation_map, typecheck_only=True)
+            if build_ok:
+                build_ok, build_log = await _run_build_check(file_plan_map, implementation_map)
             if build_ok:
                 return {
                     "type": "feedback_loop",
@@ -206,14 +301,8 @@ async def run_orchestration_with_feedback(
                     "junior_sessions": junior_session_map,
                 }
             else:
-                feedback_items.append(
-                    {
-                        "type": "feedback",
-                        "filename": "build",
-                        "message": build_log[:2000],
-                        "blocking": True,
-                    }
-                )
+                build_error_items = _summarize_build_errors(build_log)
+                feedback_items.extend(build_error_items)
                 blocking = True
 
         if round_index == max_rounds - 1 and not blocking:
@@ -228,10 +317,25 @@ async def run_orchestration_with_feedback(
                 "junior_sessions": junior_session_map,
             }
 
-        current_instructions = _build_feedback_instructions(
-            instructions, round_index, feedback_items, None
+        # Never reuse an implementation that drew feedback (e.g. build errors), neither
+        # from this loop's cache nor from the junior's prompt-level reply cache
+        flagged_files = {item.get("filename") for item in feedback_items}
+        if any(item["filename"] not in implementation_map for item in build_error_items):
+            # Build failure not attributable to a generated file: the "build" fallback,
+            # or a template file (e.g. src/main.tsx) failing on a generated import.
+            # Any generated file may be at fault
+            implementation_cache.clear()
+            flagged_files.update(implementation_map)
+        for key in [key for key, impl in implementation_cache.items() if impl.get("filename") in flagged_files]:
+            del implementation_cache[key]
+        junior_dev.evict_cached_completions(
+            completion_keys.pop(key)
+            for fp, key in zip(plan.files, plan_keys)
+            if fp.filename in flagged_files and key in completion_keys
         )
 
+        current_instructions = _build_feedback_instructions(round_index, feedback_items, None)
+
     return {
         "type": "feedback_loop",
         "status": "max_rounds_reached",
@@ -1,22 +1,55 @@
+import asyncio
+import contextlib
+import hashlib
 import os
 import openai
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.ratelimit import AsyncRateLimiter
+from app.core.session_store import SessionStore
 from app.schemas.plan import FilePlan, FunctionInfo, Dependency
-from typing import Dict, List, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 import json
+import logging
 import uuid
+from collections import OrderedDict
 
-# In-memory storage for junior dev sessions
+logger = logging.getLogger(__name__)
+
+# In-memory storage for junior dev sessions, bounded by count, idle time and turns
 # Structure: { session_id: [ { role: "user"|"assistant", content: str } ] }
-junior_sessions: Dict[str, List[Dict[str, str]]] = {}
+junior_sessions = SessionStore(
+    max_sessions=settings.JUNIOR_SESSION_MAX,
+    ttl_seconds=settings.JUNIOR_SESSION_TTL,
+    max_turns=settings.JUNIOR_SESSION_MAX_TURNS,
+)
+
+# LRU of raw junior replies keyed by a hash of model + prompt, so an identical
+# request (retry, rebuild of the same plan) skips the API entirely. Implementation
+# results carry their "cache_key" so replies that later fail the build can be evicted.
+completion_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# Junior API calls in flight, keyed like completion_cache: [task, waiter count].
+# Concurrent identical requests await the same call instead of issuing their own.
+_inflight_completions: Dict[str, List[Any]] = {}
+
+# Caps concurrent junior dev API calls so parallel fan-out stays under provider rate limits
+junior_dev_semaphore = asyncio.Semaphore(max(1, settings.JUNIOR_DEV_CONCURRENCY))
 
-# Initialize OpenAI client
+# Initialize async OpenAI client over the shared, pooled HTTP client
 junior_dev_api_key = settings.get_junior_dev_api_key()
-client = openai.OpenAI(
+client = openai.AsyncOpenAI(
     api_key=junior_dev_api_key,
     base_url=settings.JUNIOR_DEV_BASE_URL,
+    http_client=get_http_client(settings.JUNIOR_DEV_BASE_URL),
+    max_retries=settings.LLM_MAX_RETRIES,
 ) if junior_dev_api_key else None
 
+# Optional requests-per-minute throttle, applied before the concurrency gate
+junior_dev_rate_limiter = (
+    AsyncRateLimiter(settings.JUNIOR_DEV_RPM) if settings.JUNIOR_DEV_RPM > 0 else contextlib.nullcontext()
+)
+
 JUNIOR_DEV_SYSTEM_PROMPT = """
 **Role:** You are a Strict React/TypeScript Component Generator that can also raise concise feedback if implementation is blocked. You function as a deterministic code engine that translates technical specifications from an "Orchestrator" into error-free, production-ready React code.
 
@@ -190,6 +223,230 @@ export default StatsCard;
 """
 
 
+BATCH_OUTPUT_INSTRUCTIONS = """
+You are implementing several files in one response. Apply every rule above to each file independently.
+Return ONLY a JSON object (no markdown fences) of the form:
+{"files": [{"filename": "<file name>", "content": "<full file source>"}]}
+Include exactly one entry per requested file, using the filenames given. If a file is blocked, use
+{"filename": "<file name>", "type": "feedback", "blocking": true|false, "message": "<short reason>"} as its entry instead.
+"""
+
+# System messages built once and shared by reference; the SDK only reads them.
+# They are always the first message and never templated, so servers with prefix
+# caching (hosted providers, vLLM --enable-prefix-caching) reuse their KV cache.
+_SYSTEM_MESSAGE = {"role": "system", "content": JUNIOR_DEV_SYSTEM_PROMPT}
+_BATCH_SYSTEM_MESSAGE = {"role": "system", "content": JUNIOR_DEV_SYSTEM_PROMPT + BATCH_OUTPUT_INSTRUCTIONS}
+
+
+# Smallest max_tokens a file is given: a plain Tailwind/shadcn page with a single
+# function routinely needs several thousand tokens
+MIN_FILE_TOKENS = 4096
+
+
+def _token_estimate(file_plan: FilePlan) -> int:
+    """
+    Rough output size of one file, from the size of its plan. Router and navbar
+    files render one element per route, so routes count as well.
+    """
+    return (
+        1500
+        + 400 * len(file_plan.functions)
+        + 200 * len(file_plan.dependencies or [])
+        + 500 * len(file_plan.routes or [])
+    )
+
+
+def _token_budget(file_plans: List[FilePlan]) -> int:
+    """
+    max_tokens for implementing one or more files in a single reply. This is a hint
+    sized to the plans, never below MIN_FILE_TOKENS; a reply that still hits it is
+    retried once at JUNIOR_DEV_MAX_TOKENS (see _create_completion).
+    """
+    estimate = sum(_token_estimate(fp) for fp in file_plans)
+    return min(settings.JUNIOR_DEV_MAX_TOKENS, max(MIN_FILE_TOKENS, estimate))
+
+
+def _file_key(file_plan: FilePlan) -> str:
+    """Identify a planned file by "<path>/<filename>"; filenames repeat across paths."""
+    return f"{file_plan.path.rstrip('/')}/{file_plan.filename}" if file_plan.path else file_plan.filename
+
+
+def group_for_batching(file_plans: List[FilePlan], batch_size: int) -> List[List[FilePlan]]:
+    """
+    Split file plans (in order) into batches of at most batch_size files whose
+    combined token estimate stays within JUNIOR_DEV_MAX_TOKENS, so small files share
+    a request while large ones still get one of their own. The MIN_FILE_TOKENS floor
+    applies per request, not per file, so it does not stop small files sharing one.
+    Files with the same name (in different paths) never share a batch, since the
+    batched reply tells its files apart by name.
+    """
+    batches: List[List[FilePlan]] = []
+    current: List[FilePlan] = []
+    current_tokens = 0
+    for file_plan in file_plans:
+        tokens = _token_estimate(file_plan)
+        if current and (
+            len(current) >= batch_size
+            or current_tokens + tokens > settings.JUNIOR_DEV_MAX_TOKENS
+            or any(fp.filename == file_plan.filename for fp in current)
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(file_plan)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TruncatedReplyError(RuntimeError):
+    """The model stopped at max_tokens, so the reply is an incomplete file."""
+
+
+async def _create_completion(messages: List[Dict[str, Any]], max_tokens: int) -> Optional[str]:
+    """
+    Send a chat completion request for the junior dev model and return the reply
+    text (None if the API returned no content). A reply cut off at max_tokens is
+    retried once at JUNIOR_DEV_MAX_TOKENS; TruncatedReplyError is raised only if
+    that limit is hit too.
+    """
+    try:
+        return await _request_completion(messages, max_tokens)
+    except TruncatedReplyError:
+        if max_tokens >= settings.JUNIOR_DEV_MAX_TOKENS:
+            raise
+        logger.info("Junior reply hit max_tokens=%d; retrying at %d", max_tokens, settings.JUNIOR_DEV_MAX_TOKENS)
+        return await _request_completion(messages, settings.JUNIOR_DEV_MAX_TOKENS)
+
+
+async def _request_completion(messages: List[Dict[str, Any]], max_tokens: int) -> Optional[str]:
+    """
+    Make one chat completion request; raises TruncatedReplyError when the reply
+    was cut off at max_tokens.
+
+    Gated by junior_dev_rate_limiter and junior_dev_semaphore to keep parallel
+    fan-out under provider rate limits; 429/5xx/connection errors are retried by
+    the client with exponential backoff (LLM_MAX_RETRIES). With
+    JUNIOR_DEV_STREAM the reply is streamed and assembled as chunks arrive, which
+    keeps long generations from idling on a single read.
+    """
+    async with junior_dev_rate_limiter, junior_dev_semaphore:
+        if settings.JUNIOR_DEV_STREAM:
+            stream = await client.chat.completions.create(
+                model=settings.JUNIOR_DEV_MODEL,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            parts = []
+            finish_reason = None
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            if finish_reason == "length":
+                raise TruncatedReplyError(f"Reply was cut off at max_tokens={max_tokens}")
+            return "".join(parts) if parts else None
+
+        response = await client.chat.completions.create(
+            model=settings.JUNIOR_DEV_MODEL,
+            messages=messages,
+            temperature=0.3,  # Slight variability while keeping outputs stable
+            max_tokens=max_tokens
+        )
+    if not response or not response.choices:
+        return None
+    if logger.isEnabledFor(logging.DEBUG):
+        # The system prompt is a fixed first message so providers with automatic
+        # prefix caching can reuse it; report how much of the prompt was a cache hit
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None:
+            logger.debug("Prompt tokens: %s (cached: %s)", usage.prompt_tokens, details.cached_tokens)
+    if getattr(response.choices[0], "finish_reason", None) == "length":
+        raise TruncatedReplyError(f"Reply was cut off at max_tokens={max_tokens}")
+    return response.choices[0].message.content
+
+
+async def _shared_completion(cache_key: str, messages: List[Dict[str, Any]], max_tokens: int) -> Optional[str]:
+    """
+    Run _create_completion once per cache key at a time; callers that arrive while
+    an identical call is in flight wait for its reply. The call is cancelled only
+    once every caller waiting on it has been cancelled.
+    """
+    entry = _inflight_completions.get(cache_key)
+    if entry is None:
+        task = asyncio.create_task(_create_completion(messages, max_tokens))
+        entry = _inflight_completions[cache_key] = [task, 0]
+        task.add_done_callback(lambda _task, entry=entry: _forget_inflight(cache_key, entry))
+    else:
+        logger.debug("Joining in-flight junior call")
+
+    task = entry[0]
+    entry[1] += 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not task.done():
+            # Unregister before cancelling so a caller arriving now starts a fresh
+            # call instead of joining one that is being cancelled
+            _forget_inflight(cache_key, entry)
+            task.cancel()
+
+
+def _forget_inflight(cache_key: str, entry: List[Any]) -> None:
+    if _inflight_completions.get(cache_key) is entry:
+        del _inflight_completions[cache_key]
+
+
+def _completion_cache_key(messages: List[Dict[str, Any]]) -> str:
+    """Hash the model and the full prompt (system prompt, history and request)."""
+    payload = json.dumps([settings.JUNIOR_DEV_MODEL, messages], sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cached_completion(key: str) -> Optional[str]:
+    reply = completion_cache.get(key)
+    if reply is not None:
+        completion_cache.move_to_end(key)
+    return reply
+
+
+def _cache_completion(key: str, reply: str) -> None:
+    if settings.JUNIOR_DEV_CACHE_SIZE <= 0:
+        return
+    completion_cache[key] = reply
+    completion_cache.move_to_end(key)
+    while len(completion_cache) > settings.JUNIOR_DEV_CACHE_SIZE:
+        completion_cache.popitem(last=False)
+
+
+def evict_cached_completions(cache_keys) -> None:
+    """
+    Drop cached replies by the keys implement_component_with_cache_key returned,
+    e.g. because their code failed the build. Other requests' replies for files
+    with the same name are kept. (implement_batch replies are never cached.)
+    """
+    for key in cache_keys:
+        completion_cache.pop(key, None)
+
+
+def _history_summary(filename: str, reply: str) -> str:
+    """
+    Shorten a reply for session history: follow-up turns only need to know what
+    was delivered, and full code blobs would be re-sent as input tokens every turn.
+    """
+    limit = settings.JUNIOR_SESSION_REPLY_CHARS
+    if limit <= 0 or len(reply) <= limit:
+        return reply
+    return f"Delivered {filename} ({len(reply)} chars). Summary: {reply[:limit]}..."
+
+
 def clean_code_output(code: str) -> str:
     """
     Remove markdown code block tags from the generated code.
@@ -201,46 +458,67 @@ def clean_code_output(code: str) -> str:
         Clean code without markdown wrappers
     """
     code = code.strip()
-    
+
+    # Locate both fences first and slice once, rather than copying a large reply
+    # once per fence removed
+    start, end = 0, len(code)
+
     # Remove opening code fence with optional language tag
     # Matches: ```tsx, ```typescript, ```javascript, ```jsx, ```ts, ```js, or just ```
     if code.startswith("```"):
-        # Find the end of the first line (the opening fence)
+        # Skip past the end of the first line (the opening fence)
         first_newline = code.find("\n")
         if first_newline != -1:
-            code = code[first_newline + 1:]
-    
+            start = first_newline + 1
+
     # Remove closing code fence
-    if code.endswith("```"):
-        # Find the last occurrence of ```
-        last_fence = code.rfind("```")
-        if last_fence != -1:
-            code = code[:last_fence]
-    
-    return code.strip()
+    if code.endswith("```", start):
+        end -= 3
+
+    return code[start:end].strip()
 
 
 def _parse_feedback_or_code(raw: str) -> Dict[str, Any]:
     """
     Parse a junior response that could be code or a feedback JSON payload.
     """
-    cleaned = raw.strip()
+    cleaned = clean_code_output(raw)
 
-    if cleaned.startswith("```"):
-        first_newline = cleaned.find("\n")
-        if first_newline != -1:
-            cleaned = cleaned[first_newline + 1 :]
-    if cleaned.endswith("```"):
-        cleaned = cleaned[: cleaned.rfind("```")].strip()
+    # Only a reply that is a JSON object can be feedback; skip the JSON parse
+    # attempt for the common case of (tens of KB of) code
+    if cleaned.startswith("{"):
+        try:
+            parsed = json.loads(cleaned)
+            if isinstance(parsed, dict) and "type" in parsed:
+                return parsed
+        except json.JSONDecodeError:
+            pass
 
-    try:
-        parsed = json.loads(cleaned)
-        if isinstance(parsed, dict) and "type" in parsed:
-            return parsed
-    except json.JSONDecodeError:
-        pass
+    return {"type": "implementation", "code": cleaned}
 
-    return {"type": "implementation", "code": clean_code_output(raw)}
+
+def _result_payload(file_plan: FilePlan, reply: str, session_id: str) -> Dict[str, Any]:
+    """Turn a junior reply for one file into an implementation or feedback result."""
+    parsed = _parse_feedback_or_code(reply)
+    if parsed.get("type") == "feedback":
+        result_payload = {
+            "type": "feedback",
+            "filename": file_plan.filename,
+            "message": parsed.get("message", ""),
+            "blocking": bool(parsed.get("blocking", False)),
+            "session_id": session_id,
+        }
+        logger.debug("Feedback parsed for %s: %s", file_plan.filename, result_payload)
+        return result_payload
+
+    cleaned_code = parsed.get("code", clean_code_output(reply))
+    logger.debug("Code cleaned, length: %d chars", len(cleaned_code))
+    return {
+        "type": "implementation",
+        "filename": file_plan.filename,
+        "content": cleaned_code,
+        "session_id": session_id
+    }
 
 
 async def implement_component(
@@ -259,20 +537,30 @@ async def implement_component(
     Returns:
         Dictionary containing the implementation result
     """
+    result, _ = await implement_component_with_cache_key(file_plan, global_style, session_id)
+    return result
+
+
+async def implement_component_with_cache_key(
+    file_plan: FilePlan,
+    global_style: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Like implement_component, but also return the key its reply is cached under
+    (None unless the result is an implementation), so a caller whose build
+    rejects the code can pass it to evict_cached_completions.
+    """
     if not client:
         return {
             "type": "error",
             "content": "API key is not set for the configured junior dev provider.",
             "session_id": session_id
-        }
+        }, None
 
     if not session_id:
         session_id = str(uuid.uuid4())
     
-    # Ensure session exists in junior_sessions
-    if session_id not in junior_sessions:
-        junior_sessions[session_id] = []
-
     # Prepare the implementation request
     implementation_request = _prepare_implementation_request(file_plan, global_style)
     
@@ -280,77 +568,52 @@ async def implement_component(
     history = junior_sessions.get(session_id, [])
     
     # Prepare messages for OpenAI API
-    messages = [{"role": "system", "content": JUNIOR_DEV_SYSTEM_PROMPT}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": implementation_request})
+    messages = [_SYSTEM_MESSAGE, *history, {"role": "user", "content": implementation_request}]
     
     try:
-        print(f"DEBUG: Calling OpenAI API for {file_plan.filename}")
-        response = client.chat.completions.create(
-            model=settings.JUNIOR_DEV_MODEL,
-            messages=messages,
-            temperature=0.3,  # Slight variability while keeping outputs stable
-            max_tokens=30000
-        )
-        
-        print(f"DEBUG: API response received for {file_plan.filename}")
-        
-        # Check if response and content exist
-        if not response or not response.choices or len(response.choices) == 0:
-            print(f"DEBUG: No response received from OpenAI API")
-            return {
-                "type": "error",
-                "content": f"No response received from OpenAI API",
-                "session_id": session_id
-            }
-        
-        message_content = response.choices[0].message.content
-        if message_content is None:
-            print(f"DEBUG: OpenAI API returned empty content")
-            return {
-                "type": "error",
-                "content": f"OpenAI API returned empty content",
-                "session_id": session_id
-            }
-        
-        implementation_code = message_content.strip()
-        print(f"DEBUG: Implementation code received ({len(implementation_code)} chars): {implementation_code[:100]}...")
+        cache_key = _completion_cache_key(messages)
+        implementation_code = _cached_completion(cache_key)
+        if implementation_code is not None:
+            logger.debug("Reusing cached implementation for %s", file_plan.filename)
+        else:
+            logger.debug("Calling OpenAI API for %s", file_plan.filename)
+            message_content = await _shared_completion(cache_key, messages, _token_budget([file_plan]))
+            
+            logger.debug("API response received for %s", file_plan.filename)
+            
+            # Check if content exists
+            if message_content is None:
+                logger.warning("OpenAI API returned empty content for %s", file_plan.filename)
+                return {
+                    "type": "error",
+                    "content": f"OpenAI API returned empty content",
+                    "session_id": session_id
+                }, None
+            
+            implementation_code = message_content.strip()
+            logger.debug("Implementation code received (%d chars)", len(implementation_code))
         
-        parsed = _parse_feedback_or_code(implementation_code)
-        if parsed.get("type") == "feedback":
-            result_payload = {
-                "type": "feedback",
-                "filename": file_plan.filename,
-                "message": parsed.get("message", ""),
-                "blocking": bool(parsed.get("blocking", False)),
-                "session_id": session_id,
-            }
-            print(f"DEBUG: Feedback parsed for {file_plan.filename}: {result_payload}")
+        result_payload = _result_payload(file_plan, implementation_code, session_id)
+        if result_payload["type"] != "implementation":
+            # Only code is cached; feedback means the junior needs new input anyway
+            cache_key = None
         else:
-            cleaned_code = parsed.get("code", clean_code_output(implementation_code))
-            print(f"DEBUG: Code cleaned, length: {len(cleaned_code)} chars")
-            result_payload = {
-                "type": "implementation",
-                "filename": file_plan.filename,
-                "content": cleaned_code,
-                "session_id": session_id
-            }
+            _cache_completion(cache_key, implementation_code)
         
         # Update chat history
-        junior_sessions[session_id].append({"role": "user", "content": implementation_request})
-        junior_sessions[session_id].append({"role": "assistant", "content": implementation_code})
+        junior_sessions.append_turn(
+            session_id, implementation_request, _history_summary(file_plan.filename, implementation_code)
+        )
         
-        return result_payload
+        return result_payload, cache_key
 
     except Exception as e:
-        print(f"DEBUG: Exception in junior_dev API call: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("junior_dev API call failed for %s", file_plan.filename)
         return {
             "type": "error",
             "content": f"Failed to implement component: {str(e)}",
             "session_id": session_id
-        }
+        }, None
 
 
 def _prepare_implementation_request(
@@ -375,28 +638,22 @@ def _prepare_implementation_request(
         f"- Filename: {file_plan.filename}",
         f"- Props Interface: {file_plan.props}",
         "",
-        "**Required Functions:**"
+        "**Required Functions:**",
+        *(f"- {func.name}: {func.description}" for func in file_plan.functions),
     ]
     
-    for func in file_plan.functions:
-        request_parts.append(f"- {func.name}: {func.description}")
-    
     if file_plan.dependencies:
-        request_parts.extend([
-            "",
-            "**Dependencies:**"
-        ])
-        for dep in file_plan.dependencies:
-            imports_str = ", ".join([imp.name for imp in dep.imports])
-            request_parts.append(f"- Import {imports_str} from {dep.from_path}")
+        request_parts += ["", "**Dependencies:**"]
+        request_parts += [
+            f"- Import {', '.join(imp.name for imp in dep.imports)} from {dep.from_path}"
+            for dep in file_plan.dependencies
+        ]
     
     if file_plan.routes:
-        request_parts.extend([
-            "",
-            "**Routes to Implement (paths must match exactly):**"
-        ])
-        for route in file_plan.routes:
-            request_parts.append(f"- Path: {route.name} -> Component: {route.component}")
+        request_parts += ["", "**Routes to Implement (paths must match exactly):**"]
+        request_parts += [
+            f"- Path: {route.name} -> Component: {route.component}" for route in file_plan.routes
+        ]
 
         filename_lower = file_plan.filename.lower()
         if "app.tsx" in filename_lower or "router" in filename_lower:
@@ -405,21 +662,20 @@ def _prepare_implementation_request(
             request_parts.append("- Render Link/NavLink elements using the routes above; keep `to` values identical to the paths.")
     
     if global_style:
-        request_parts.extend([
+        request_parts += [
             "",
             "**Global Style Guidelines:**",
             f"- Color Scheme: {global_style.get('color_scheme', 'Not specified')}",
-            f"- Style Description: {global_style.get('style_description', 'Not specified')}"
-        ])
+            f"- Style Description: {global_style.get('style_description', 'Not specified')}",
+        ]
         
         if global_style.get('shadcn_components'):
-            components_str = ", ".join(global_style['shadcn_components'])
-            request_parts.append(f"- Available ShadCN Components: {components_str}")
+            request_parts.append(f"- Available ShadCN Components: {', '.join(global_style['shadcn_components'])}")
     
-    request_parts.extend([
+    request_parts += [
         "",
         "Please generate clean, professional React/TypeScript code that implements all the specified requirements."
-    ])
+    ]
     
     return "\n".join(request_parts)
 
@@ -438,18 +694,89 @@ async def implement_multiple_components(
         session_id: Optional session ID for maintaining context
         
     Returns:
-        Dictionary containing all implementation results
+        Dictionary containing all implementation results. Transcripts are kept per
+        file (or per batch) under "<session_id>:<path>/<filename>" (comma-separated
+        for a batch); "file_session_ids" maps each "<path>/<filename>" to its id for
+        get_session_history, and clear_session(session_id) clears all of them.
     """
     if not session_id:
         session_id = str(uuid.uuid4())
-    
+
+    results, planned_session_ids = await implement_files(file_plans, global_style, session_id)
+
+    # A batch that fell back to per-file calls stores each file under its own session
+    file_session_ids = {}
+    for file_plan, file_session_id, result in zip(file_plans, planned_session_ids, results):
+        if isinstance(result, dict) and result.get("session_id"):
+            file_session_id = result["session_id"]
+        file_session_ids[_file_key(file_plan)] = file_session_id
+
+    summary = _collect_results(file_plans, results, session_id)
+    summary["file_session_ids"] = file_session_ids
+    return summary
+
+
+async def implement_files(
+    file_plans: List[FilePlan],
+    global_style: Optional[Dict[str, Any]],
+    session_id: str,
+    run_all: Optional[Callable[[Iterable[Awaitable[Any]]], Awaitable[List[Any]]]] = None,
+) -> Tuple[List[Any], List[str]]:
+    """
+    Implement file plans concurrently, batching small files when
+    JUNIOR_DEV_BATCH_SIZE > 1, and return one result (or exception) per plan in
+    plan order, together with the session id each plan was given.
+
+    run_all runs the implement_component/implement_batch coroutines and returns
+    their results in order; by default they are gathered with return_exceptions.
+    """
+    if run_all is None:
+        async def run_all(coros):
+            return await asyncio.gather(*coros, return_exceptions=True)
+
+    # Files are independent, so implement them concurrently (bounded by
+    # junior_dev_semaphore). Each file (or batch of small files, with
+    # JUNIOR_DEV_BATCH_SIZE > 1) gets its own session under session_id so
+    # concurrent calls never interleave one transcript.
+    if settings.JUNIOR_DEV_BATCH_SIZE > 1:
+        batches = group_for_batching(file_plans, settings.JUNIOR_DEV_BATCH_SIZE)
+        batch_session_ids = [
+            f"{session_id}:{','.join(_file_key(fp) for fp in batch)}" for batch in batches
+        ]
+        batch_results = await run_all(
+            implement_batch(batch, global_style, batch_session_id)
+            for batch, batch_session_id in zip(batches, batch_session_ids)
+        )
+        # Flatten back to one result per planned file, in plan order
+        results = []
+        planned_session_ids = []
+        for batch, batch_session_id, batch_result in zip(batches, batch_session_ids, batch_results):
+            planned_session_ids.extend([batch_session_id] * len(batch))
+            if isinstance(batch_result, Exception):
+                results.extend([batch_result] * len(batch))
+            else:
+                results.extend(batch_result)
+        return results, planned_session_ids
+
+    planned_session_ids = [f"{session_id}:{_file_key(fp)}" for fp in file_plans]
+    results = await run_all(
+        implement_component(file_plan, global_style, file_session_id)
+        for file_plan, file_session_id in zip(file_plans, planned_session_ids)
+    )
+    return list(results), planned_session_ids
+
+
+def _collect_results(file_plans: List[FilePlan], results: List[Any], session_id: str) -> Dict[str, Any]:
+    """Split per-file results (or exceptions) into the batch_implementation summary."""
     implementations = []
     errors = []
-    
-    for file_plan in file_plans:
-        result = await implement_component(file_plan, global_style, session_id)
-        
-        if result["type"] == "error":
+    for file_plan, result in zip(file_plans, results):
+        if isinstance(result, Exception):
+            errors.append({
+                "filename": file_plan.filename,
+                "error": str(result)
+            })
+        elif result["type"] == "error":
             errors.append({
                 "filename": file_plan.filename,
                 "error": result["content"]
@@ -468,25 +795,274 @@ async def implement_multiple_components(
     }
 
 
+def _batch_entry_error(entry: Dict[str, Any]) -> Optional[str]:
+    """Error message for a Batch API result line whose request failed, else None."""
+    error = entry.get("error")
+    if error:
+        message = error.get("message") if isinstance(error, dict) else None
+        return f"Batch request failed: {message or error}"
+    response = entry.get("response")
+    if response is None:
+        return "Batch request failed without a response"
+    status_code = response.get("status_code", 200)
+    if status_code != 200:
+        body = response.get("body")
+        body_error = body.get("error") if isinstance(body, dict) else None
+        message = body_error.get("message") if isinstance(body_error, dict) else None
+        return f"Batch request failed with status {status_code}" + (f": {message}" if message else "")
+    return None
+
+
+async def implement_multiple_components_offline(
+    file_plans: List[FilePlan],
+    global_style: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None,
+    poll_interval: float = 30.0,
+    max_poll_interval: float = 300.0,
+) -> Dict[str, Any]:
+    """
+    Implement multiple components through the provider's Batch API.
+
+    Every file becomes one line of a JSONL batch (same prompt and token budget as
+    implement_component) submitted with a 24h completion window, which providers
+    bill at a discount and count against separate rate limits. The batch is polled
+    with exponential backoff, so this is only suitable for offline/bulk jobs, not
+    interactive requests. No session history is read or recorded.
+
+    Args:
+        file_plans: List of file plans to implement
+        global_style: Optional global style information
+        session_id: Optional session ID used to label the results
+        poll_interval: Seconds before the first status check
+        max_poll_interval: Upper bound on the delay between status checks
+
+    Returns:
+        Dictionary shaped like implement_multiple_components' result
+    """
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    if not client:
+        error = RuntimeError("API key is not set for the configured junior dev provider.")
+        return _collect_results(file_plans, [error] * len(file_plans), session_id)
+
+    # Plan indices as ids: filenames can repeat across paths, and ids must be unique
+    lines = [
+        json.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": settings.JUNIOR_DEV_MODEL,
+                "messages": [
+                    _SYSTEM_MESSAGE,
+                    {"role": "user", "content": _prepare_implementation_request(fp, global_style)},
+                ],
+                "temperature": 0.3,
+                "max_tokens": _token_budget([fp]),
+            },
+        })
+        for index, fp in enumerate(file_plans)
+    ]
+
+    try:
+        input_file = await client.files.create(
+            file=("junior_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        delay = poll_interval
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not (batch.output_file_id or batch.error_file_id):
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+        # Successful requests land in the output file and failed ones in the error
+        # file; either may be absent when every request went the other way
+        output_lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                output_lines.extend((await client.files.content(file_id)).text.splitlines())
+    except Exception as e:
+        logger.exception("junior_dev batch job failed")
+        return _collect_results(file_plans, [e] * len(file_plans), session_id)
+
+    # custom_id -> reply text, or an error message for a reply that can't be used
+    replies: Dict[str, str] = {}
+    failures: Dict[str, str] = {}
+    for line in output_lines:
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            custom_id = entry["custom_id"]
+            error = _batch_entry_error(entry)
+            if error is not None:
+                failures[custom_id] = error
+                continue
+            choice = entry["response"]["body"]["choices"][0]
+            if choice.get("finish_reason") == "length":
+                failures[custom_id] = "Reply was cut off at max_tokens"
+            elif isinstance(choice["message"]["content"], str):
+                replies[custom_id] = choice["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            # Malformed line: its file is reported as missing below
+            logger.warning("Skipping malformed batch output line (%r)", e)
+
+    results = []
+    for index, fp in enumerate(file_plans):
+        reply = replies.get(str(index), "").strip()
+        if not reply:
+            results.append({
+                "type": "error",
+                "filename": fp.filename,
+                "content": failures.get(str(index), "File missing from batch output"),
+                "session_id": session_id
+            })
+        else:
+            results.append(_result_payload(fp, reply, f"{session_id}:{_file_key(fp)}"))
+    return _collect_results(file_plans, results, session_id)
+
+
+async def implement_batch(
+    file_plans: List[FilePlan],
+    global_style: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Implement several small components with a single model round-trip.
+
+    Args:
+        file_plans: File plans to implement together
+        global_style: Optional global style information
+        session_id: Optional session ID for maintaining context
+
+    Returns:
+        One result per file plan, in order, shaped like implement_component results.
+        Falls back to one implement_component call per file if the batched response
+        cannot be parsed, or if two files share a name (the reply could not tell
+        them apart).
+    """
+    if len(file_plans) == 1:
+        return [await implement_component(file_plans[0], global_style, session_id)]
+
+    if not client:
+        return [
+            {
+                "type": "error",
+                "filename": fp.filename,
+                "content": "API key is not set for the configured junior dev provider.",
+                "session_id": session_id
+            }
+            for fp in file_plans
+        ]
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    async def implement_each() -> List[Dict[str, Any]]:
+        # Per-file sessions under this batch's session, so clear_session still finds them
+        return list(await asyncio.gather(
+            *(implement_component(fp, global_style, f"{session_id}:{_file_key(fp)}") for fp in file_plans)
+        ))
+
+    if len({fp.filename for fp in file_plans}) < len(file_plans):
+        return await implement_each()
+
+    implementation_request = "\n\n---\n\n".join(
+        _prepare_implementation_request(fp, global_style) for fp in file_plans
+    )
+    messages = [
+        _BATCH_SYSTEM_MESSAGE,
+        *junior_sessions.get(session_id, []),
+        {"role": "user", "content": implementation_request},
+    ]
+
+    try:
+        # The batched reply holds every file, so it gets their combined budget
+        max_tokens = _token_budget(file_plans)
+        raw = (await _create_completion(messages, max_tokens) or "").strip()
+        parsed = json.loads(clean_code_output(raw))
+        entries = parsed.get("files") if isinstance(parsed, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("Batched response did not contain a files list")
+        # Malformed entries (non-objects, non-string filenames) are skipped and
+        # reported below as missing files
+        entries_by_name = {
+            entry["filename"]: entry
+            for entry in entries
+            if isinstance(entry, dict) and isinstance(entry.get("filename"), str)
+        }
+    except Exception as e:
+        logger.warning("Batched junior_dev call failed (%s); falling back to per-file calls", e)
+        return await implement_each()
+
+    junior_sessions.append_turn(
+        session_id, implementation_request, _history_summary(", ".join(fp.filename for fp in file_plans), raw)
+    )
+
+    results = []
+    for fp in file_plans:
+        entry = entries_by_name.get(fp.filename)
+        if entry is None:
+            results.append({
+                "type": "error",
+                "filename": fp.filename,
+                "content": "File missing from batched response",
+                "session_id": session_id
+            })
+        elif entry.get("type") == "feedback":
+            results.append({
+                "type": "feedback",
+                "filename": fp.filename,
+                "message": str(entry.get("message") or ""),
+                "blocking": bool(entry.get("blocking", False)),
+                "session_id": session_id,
+            })
+        elif not isinstance(entry.get("content"), str):
+            results.append({
+                "type": "error",
+                "filename": fp.filename,
+                "content": "Batched response has no code for this file",
+                "session_id": session_id
+            })
+        else:
+            results.append({
+                "type": "implementation",
+                "filename": fp.filename,
+                "content": clean_code_output(entry["content"]),
+                "session_id": session_id
+            })
+    return results
+
+
 def clear_session(session_id: str) -> bool:
     """
-    Clear a junior dev session.
+    Clear a junior dev session, including the per-file sessions
+    ("<session_id>:<path>/<filename>") created by implement_multiple_components.
     
     Args:
         session_id: The session ID to clear
         
     Returns:
-        True if session was cleared, False if session didn't exist
+        True if any session was cleared, False if none existed
     """
+    cleared = junior_sessions.delete_prefix(f"{session_id}:") > 0
     if session_id in junior_sessions:
         del junior_sessions[session_id]
-        return True
-    return False
+        cleared = True
+    return cleared
 
 
 def get_session_history(session_id: str) -> Optional[List[Dict[str, str]]]:
     """
     Get the chat history for a session.
+
+    implement_multiple_components keeps one transcript per file; pass the ids from
+    its result's "file_session_ids" to read those.
     
     Args:
         session_id: The session ID to get history for
@@ -1,18 +1,24 @@
 import openai
 from app.core.config import settings
+from app.core.http import get_http_client
 from app.schemas.plan import OrchestrationPlan
 import json
+import logging
 import uuid
 from typing import List, Optional, Dict, Any
 
+logger = logging.getLogger(__name__)
+
 # In-memory storage for chat history
 chat_sessions = {}
 
-# Initialize OpenAI client
+# Initialize async OpenAI client over the shared, pooled HTTP client
 orchestrator_api_key = settings.get_orchestrator_api_key()
-client = openai.OpenAI(
+client = openai.AsyncOpenAI(
     api_key=orchestrator_api_key,
     base_url=settings.ORCHESTRATOR_BASE_URL,
+    http_client=get_http_client(settings.ORCHESTRATOR_BASE_URL),
+    max_retries=settings.LLM_MAX_RETRIES,
 ) if orchestrator_api_key else None
 
 SYSTEM_PROMPT = """
@@ -276,6 +282,9 @@ Return ONLY valid JSON.
 - Always include a root route (`"/"`) that typically renders the home page or redirects to `/home`.
 """
 
+# Built once and shared by reference; the SDK only reads it
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
 async def process_chat(instructions: str, session_id: str = None, images: Optional[List[Dict[str, str]]] = None):
     """
     Process chat instructions with optional images.
@@ -300,7 +309,7 @@ async def process_chat(instructions: str, session_id: str = None, images: Option
     history = chat_sessions.get(session_id, [])
     
     # Prepare messages for OpenAI API
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages = [_SYSTEM_MESSAGE]
     
     # Convert history to OpenAI format
     for msg in history:
@@ -321,7 +330,7 @@ async def process_chat(instructions: str, session_id: str = None, images: Option
     
     # Add images if provided
     if images:
-        print(f"[process_chat] Adding {len(images)} image(s) to the request")
+        logger.debug("[process_chat] Adding %d image(s) to the request", len(images))
         for image_data in images:
             mime_type = image_data.get("mime_type", "image/jpeg")
             base64_data = image_data.get("data", "")
@@ -344,7 +353,7 @@ async def process_chat(instructions: str, session_id: str = None, images: Option
     messages.append({"role": "user", "content": user_content})
     
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=settings.ORCHESTRATOR_MODEL,
             messages=messages,
             temperature=0.3,
@@ -391,8 +400,7 @@ async def process_chat(instructions: str, session_id: str = None, images: Option
                 }
         except (json.JSONDecodeError, ValueError) as e:
             # Fallback to question if JSON parsing fails (assuming it's not a plan yet)
-            print(f"JSON Parse Error: {e}")
-            pass
+            logger.debug("Orchestrator reply is not a plan (%s); treating it as a question", e)
             
         return {
             "type": "question",
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from app.core.config import settings
+
+
+# Response headers that only describe the request that generated the zip, such as
+# the URL of the dev server it started; they are never replayed from the cache
+REQUEST_ONLY_HEADERS = frozenset({"x-documentation-url"})
+
+
+class ZipResponseCache:
+    """
+    LRU + TTL cache of generated template zips, keyed by a hash of the request.
+
+    Lets a repeated identical request skip the orchestrator, the junior devs and
+    the template build entirely. Entries are stored as uniquely named files in
+    `cache_dir`; evicted or expired entries are unlinked once every response
+    serving them has finished.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, cache_dir: Path):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, Tuple[float, Path, Dict[str, str], os.stat_result]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Responses handed out per cached zip that have not finished sending yet,
+        # and evicted zips waiting for those responses before being unlinked
+        self._pending: Dict[Path, int] = {}
+        self._evicted: Set[Path] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(
+        instructions: str,
+        feedback_loop: bool,
+        max_rounds: int,
+        images: Optional[List[Dict[str, str]]] = None,
+    ) -> str:
+        """Hash the inputs that determine the generated project."""
+        image_digests = [
+            hashlib.sha256(image.get("data", "").encode("utf-8")).hexdigest()
+            for image in images or []
+        ]
+        payload = json.dumps(
+            {
+                "instructions": instructions.strip(),
+                "feedback_loop": feedback_loop,
+                "max_rounds": max_rounds,
+                "images": image_digests,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[FileResponse]:
+        """Return a response for a cached zip, or None on a miss."""
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, zip_path, headers, stat_result = entry
+            if time.monotonic() - created_at > self.ttl_seconds or not zip_path.exists():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return self._response(zip_path, headers, stat_result)
+
+    async def store(self, key: str, response: FileResponse) -> FileResponse:
+        """
+        Move the zip behind `response` into the cache and return a response serving
+        the cached copy (which, unlike the original, is not deleted after sending).
+        The returned response keeps all of the original's headers; later cache hits
+        omit REQUEST_ONLY_HEADERS.
+        """
+        response_headers = {k: v for k, v in response.headers.items() if k.lower().startswith("x-")}
+        headers = {k: v for k, v in response_headers.items() if k.lower() not in REQUEST_ONLY_HEADERS}
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # A fresh name per stored zip: an identical request finishing concurrently
+        # must not replace a file another response is about to send
+        cached_path = self.cache_dir / f"{key}-{uuid.uuid4().hex}.zip"
+        os.replace(response.path, cached_path)
+        stat_result = response.stat_result or os.stat(cached_path)
+
+        async with self._lock:
+            if key in self._entries:
+                # Replaced by a concurrent identical request
+                self._evict(key)
+            self._entries[key] = (time.monotonic(), cached_path, headers, stat_result)
+            self._entries.move_to_end(key)
+            cached_response = self._response(cached_path, response_headers, stat_result)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+        return cached_response
+
+    def _evict(self, key: str) -> None:
+        _, zip_path, _, _ = self._entries.pop(key)
+        if self._pending.get(zip_path):
+            self._evicted.add(zip_path)
+        else:
+            zip_path.unlink(missing_ok=True)
+
+    async def _release(self, zip_path: Path) -> None:
+        """Called once a response serving zip_path has finished."""
+        remaining = self._pending.pop(zip_path, 1) - 1
+        if remaining > 0:
+            self._pending[zip_path] = remaining
+        elif zip_path in self._evicted:
+            self._evicted.discard(zip_path)
+            zip_path.unlink(missing_ok=True)
+
+    def _response(self, zip_path: Path, headers: Dict[str, Any], stat_result: os.stat_result) -> FileResponse:
+        self._pending[zip_path] = self._pending.get(zip_path, 0) + 1
+        return FileResponse(
+            path=str(zip_path),
+            filename="template.zip",
+            media_type="application/zip",
+            headers=headers,
+            stat_result=stat_result,
+            background=BackgroundTask(self._release, zip_path),
+        )
+
+
+zip_response_cache = ZipResponseCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL,
+    cache_dir=Path(tempfile.gettempdir()) / "lauzhack_zip_cache",
+)
@@ -0,0 +1,323 @@
+import asyncio
+import atexit
+import hashlib
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# The frontend template every generated project is built on
+TEMPLATE_ROOT = Path(__file__).resolve().parent.parent / "frontend_template"
+
+# Template entries that never belong in a workspace copy or the returned zip
+TEMPLATE_SKIP_DIRS = frozenset({"node_modules", "__pycache__", ".git"})
+TEMPLATE_SKIP_SUFFIXES = (".pyc",)
+
+# Files npm may rewrite in place inside the workspace, so they are never hardlinked
+_NPM_REWRITTEN_FILES = frozenset({"package.json", "package-lock.json"})
+
+# Bytes of build output kept for feedback; tsc errors are printed before vite
+# runs, so the tail of a failed build holds the diagnostics
+_BUILD_LOG_TAIL_BYTES = 16384
+
+# npm runs tsc/vite/node as child processes; starting it as the leader of its own
+# process group lets kill_process_tree stop all of them, not just npm
+if sys.platform == "win32":
+    PROCESS_GROUP_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    PROCESS_GROUP_KWARGS = {"start_new_session": True}
+
+# ioctl request number for FICLONE (copy-on-write clone on btrfs/xfs)
+_FICLONE = 0x40049409
+
+
+def fast_copytree(
+    src: Path,
+    dst: Path,
+    skip_dirs=TEMPLATE_SKIP_DIRS,
+    skip_suffixes=TEMPLATE_SKIP_SUFFIXES,
+    hardlink: bool = False,
+) -> None:
+    """
+    Copy the template tree using the fastest mechanism the platform offers.
+
+    Windows uses multithreaded robocopy; elsewhere the tree is walked with
+    walk_scandir (ignored directories are pruned before they are ever listed) and
+    each file is reflink-cloned where the filesystem supports it, else copy2'd.
+    With hardlink, files are hardlinked before falling back to copy2; only pass it
+    for internal copies whose files are replaced with write_file and never modified
+    in place, since they share an inode with the template.
+    """
+    if sys.platform == "win32":
+        result = subprocess.run(
+            ["robocopy", str(src), str(dst), "/E", "/MT:32", "/NFL", "/NDL", "/NJH", "/NJS",
+             "/XD", *skip_dirs, "/XF", *(f"*{suffix}" for suffix in skip_suffixes)],
+            capture_output=True,
+        )
+        # robocopy exit codes below 8 all mean success
+        if result.returncode < 8:
+            return
+        shutil.rmtree(dst, ignore_errors=True)
+
+    clone_supported = fcntl is not None
+    link_supported = hardlink and hasattr(os, "link")
+
+    def _copy(src_file, dst_file):
+        nonlocal clone_supported, link_supported
+        if clone_supported:
+            try:
+                with open(src_file, "rb") as fsrc, open(dst_file, "wb") as fdst:
+                    fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                shutil.copystat(src_file, dst_file)
+                return dst_file
+            except OSError:
+                # Filesystem can't clone; don't retry for the remaining files
+                clone_supported = False
+                # open(dst_file) itself may be what failed
+                Path(dst_file).unlink(missing_ok=True)
+        # Hardlinks share the inode with the template, so only link files nothing
+        # writes to in place (generated files are unlinked before being written).
+        if link_supported and os.path.basename(src_file) not in _NPM_REWRITTEN_FILES:
+            try:
+                os.link(src_file, dst_file)
+                return dst_file
+            except OSError:
+                # e.g. workspace on another device; fall back to real copies
+                link_supported = False
+        return shutil.copy2(src_file, dst_file)
+
+    created_dirs = set()
+    for entry, relpath in walk_scandir(str(src), skip_dirs):
+        if entry.name.endswith(skip_suffixes):
+            continue
+        target = os.path.join(dst, relpath)
+        parent = os.path.dirname(target)
+        if parent not in created_dirs:
+            os.makedirs(parent, exist_ok=True)
+            created_dirs.add(parent)
+        _copy(entry.path, target)
+
+
+def walk_scandir(root: str, skip_dirs):
+    """
+    Yield (DirEntry, arcname) for every file under root, with "/"-joined arcnames.
+
+    Uses os.scandir with an explicit stack so directory/file checks come from the
+    cached DirEntry type instead of an extra stat() per entry, as os.walk + Path
+    would do; directories named in skip_dirs are never listed.
+    """
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append((entry.path, f"{prefix}{entry.name}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry, prefix + entry.name
+
+
+async def kill_process_tree(proc: asyncio.subprocess.Process) -> None:
+    """
+    Kill a process started with PROCESS_GROUP_KWARGS together with its children,
+    then reap it.
+    """
+    if proc.returncode is None:
+        if sys.platform == "win32":
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/T", "/F", "/PID", str(proc.pid),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await killer.wait()
+        else:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+    await proc.wait()
+
+
+def write_file(file_path: Path, content: str) -> None:
+    """Write a generated file into a workspace copy (its parent directory must exist)."""
+    # The workspace file may be a hardlink to the template; break it before writing
+    file_path.unlink(missing_ok=True)
+    # Bytes match what goes into the zip (no platform newline translation)
+    file_path.write_bytes(content.encode('utf-8'))
+
+
+class BuildWorkspace:
+    """
+    A warm, reusable copy of the template for build checks.
+
+    The template is copied and `npm install`ed once; later checks only swap the
+    generated files and run `npm run build`. Install is re-run only when
+    package.json / package-lock.json change (or node_modules is missing). Files
+    written by the previous check are reverted to the template version first, so
+    no state leaks between checks. Checks are serialized by a lock because the
+    workspace is shared across requests.
+    """
+
+    def __init__(self, template_root: Path, command_timeout: float):
+        self.template_root = template_root
+        self.command_timeout = command_timeout
+        self._lock = asyncio.Lock()
+        self._project: Optional[Path] = None
+        self._manifest_hash: Optional[str] = None
+        self._written: Set[Path] = set()
+
+    async def run_build(
+        self,
+        file_plans: Dict[str, dict],
+        implementations: Dict[str, str],
+        typecheck_only: bool = False,
+    ) -> Tuple[bool, str]:
+        """
+        Write implementations into the workspace and run the npm build; returns (ok, log).
+
+        With typecheck_only, only `tsc -b` runs; its .tsbuildinfo lives in the warm
+        workspace's node_modules, so repeated checks are incremental.
+        """
+        targets = {}
+        for filename, content in implementations.items():
+            plan = file_plans.get(filename)
+            if not plan:
+                return False, f"No plan info for {filename}"
+            targets[Path(plan["path"]) / filename] = content
+
+        async with self._lock:
+            try:
+                project = await asyncio.to_thread(self._prepare, targets.keys())
+                # Independent small writes; overlap them on the default thread pool
+                await asyncio.gather(
+                    *(asyncio.to_thread(write_file, project / rel, content) for rel, content in targets.items())
+                )
+            except OSError as e:
+                self.close()
+                return False, f"Workspace setup failed: {e}"
+
+            ok, log = await self._ensure_installed(project)
+            if not ok:
+                return False, log
+
+            if typecheck_only:
+                build_cmd = ["npx", "--no-install", "tsc", "-b", "--pretty", "false"]
+            else:
+                build_cmd = ["npm", "run", "build"]
+            return await self._run(build_cmd, project)
+
+    async def warm_up(self) -> None:
+        """
+        Create the workspace and install dependencies ahead of the first check, so
+        the install can overlap other work (e.g. the LLM calls of the first round).
+        Failures are ignored; run_build retries them and reports the error.
+        """
+        async with self._lock:
+            try:
+                project = await asyncio.to_thread(self._ensure_project)
+            except OSError:
+                self.close()
+                return
+            await self._ensure_installed(project)
+
+    async def _ensure_installed(self, project: Path) -> Tuple[bool, str]:
+        """Run npm install unless node_modules matches the current manifests."""
+        manifest_hash = self._hash_manifests(project)
+        if manifest_hash == self._manifest_hash and (project / "node_modules").is_dir():
+            return True, ""
+        self._manifest_hash = None
+        ok, log = await self._run(["npm", "install", "--silent"], project)
+        if ok:
+            # npm may normalize package-lock.json, so hash what it left behind
+            self._manifest_hash = self._hash_manifests(project)
+        return ok, log
+
+    async def _run(self, cmd: List[str], cwd: Path) -> Tuple[bool, str]:
+        """
+        Run a command with stdout+stderr merged, keeping only the tail of its output
+        and killing it after `command_timeout` seconds.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            **PROCESS_GROUP_KWARGS,
+        )
+        tail = bytearray()
+        try:
+            async with asyncio.timeout(self.command_timeout):
+                while chunk := await proc.stdout.read(65536):
+                    tail += chunk
+                    del tail[:-_BUILD_LOG_TAIL_BYTES]
+                await proc.wait()
+        except TimeoutError:
+            output = tail.decode("utf-8", errors="replace")
+            return False, f"`{' '.join(cmd)}` timed out after {self.command_timeout:g}s\n{output}".strip()
+        finally:
+            if proc.returncode is None:
+                await kill_process_tree(proc)
+        return proc.returncode == 0, tail.decode("utf-8", errors="replace").strip()
+
+    def _prepare(self, targets) -> Path:
+        """
+        Revert the previous check's files and create the directories for this
+        check's files (runs in a thread); returns the project directory.
+        """
+        project = self._ensure_project()
+        written = {project / rel for rel in targets}
+        self._revert(project, self._written - written)
+        for directory in sorted({file_path.parent for file_path in written}):
+            directory.mkdir(parents=True, exist_ok=True)
+        # Recorded before writing so a partially written check is still reverted
+        self._written = written
+        return project
+
+    def _ensure_project(self) -> Path:
+        if self._project is None or not self._project.is_dir():
+            project = Path(tempfile.mkdtemp(prefix="lauzhack-build-ws-")) / "project"
+            fast_copytree(self.template_root, project, hardlink=True)
+            self._project = project
+            self._manifest_hash = None
+            self._written = set()
+        return self._project
+
+    def _revert(self, project: Path, paths: Set[Path]) -> None:
+        """Restore files written by the previous check to their template state."""
+        for file_path in paths:
+            file_path.unlink(missing_ok=True)
+            template_file = self.template_root / file_path.relative_to(project)
+            if template_file.is_file():
+                shutil.copy2(template_file, file_path)
+
+    def close(self) -> None:
+        """Delete the workspace; the next check starts from a fresh copy."""
+        if self._project is not None:
+            shutil.rmtree(self._project.parent, ignore_errors=True)
+        self._project = None
+        self._manifest_hash = None
+        self._written = set()
+
+    @staticmethod
+    def _hash_manifests(project: Path) -> str:
+        digest = hashlib.sha256()
+        for name in ("package.json", "package-lock.json"):
+            manifest = project / name
+            digest.update(manifest.read_bytes() if manifest.exists() else b"")
+        return digest.hexdigest()
+
+
+build_workspace = BuildWorkspace(TEMPLATE_ROOT, command_timeout=settings.BUILD_CHECK_TIMEOUT)
+atexit.register(build_workspace.close)
@@ -1,10 +1,13 @@
 import asyncio
 import json
+import time
 import unittest
 from types import SimpleNamespace
+from unittest import mock
 
 import app.services.junior_dev as junior_dev
 import app.services.orchestrator as orchestrator
+from app.schemas.plan import FilePlan
 
 
 class SequenceCompletions:
@@ -12,7 +15,7 @@ class SequenceCompletions:
         self.responses = list(responses)
         self.calls = []
 
-    def create(self, **kwargs):
+    async def create(self, **kwargs):
         if not self.responses:
             raise AssertionError("No mock responses left for chat completion calls")
         content = self.responses.pop(0)
@@ -22,6 +25,103 @@ class SequenceCompletions:
         )
 
 
+class SlowCompletions:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="const X = () => null;"))]
+        )
+
+
+class StreamingCompletions:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+
+        async def chunks():
+            for piece in self.pieces:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+        return chunks()
+
+
+class BatchJobClient:
+    """Stands in for the files/batches endpoints of the Batch API."""
+
+    def __init__(self, replies, extra_lines=(), error_lines=()):
+        self.replies = replies
+        self.extra_lines = list(extra_lines)
+        self.error_lines = list(error_lines)
+        self.uploaded = None
+        self.retrieved = 0
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    async def _upload(self, file, purpose):
+        self.uploaded = file[1].decode("utf-8")
+        return SimpleNamespace(id="file-in")
+
+    async def _create_batch(self, **kwargs):
+        return SimpleNamespace(id="batch-1", status="in_progress", output_file_id=None, error_file_id=None)
+
+    async def _retrieve(self, batch_id):
+        self.retrieved += 1
+        return SimpleNamespace(
+            id=batch_id,
+            status="completed",
+            output_file_id="file-out" if self.replies or self.extra_lines else None,
+            error_file_id="file-err" if self.error_lines else None,
+        )
+
+    async def _content(self, file_id):
+        if file_id == "file-err":
+            return SimpleNamespace(text="\n".join(json.dumps(line) for line in self.error_lines))
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+            })
+            for custom_id, content in self.replies.items()
+        ]
+        return SimpleNamespace(text="\n".join(lines + self.extra_lines))
+
+
+class TruncatedCompletions:
+    """Replies that stop at max_tokens, either whole or streamed."""
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            async def chunks():
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="const Home = ("), finish_reason=None)])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason="length")])
+
+            return chunks()
+        message = SimpleNamespace(content="const Home = (")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="length")])
+
+
+class BudgetedCompletions:
+    """Replies with a long file that only fits within max_tokens_needed."""
+
+    def __init__(self, content, max_tokens_needed):
+        self.content = content
+        self.max_tokens_needed = max_tokens_needed
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs["max_tokens"] < self.max_tokens_needed:
+            message = SimpleNamespace(content=self.content[: kwargs["max_tokens"]])
+            return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="length")])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content), finish_reason="stop")])
+
+
 class SequenceChat:
     def __init__(self, responses):
         self.completions = SequenceCompletions(responses)
@@ -38,12 +138,14 @@ class AgentFlowTests(unittest.TestCase):
         self.original_junior_client = junior_dev.client
         orchestrator.chat_sessions.clear()
         junior_dev.junior_sessions.clear()
+        junior_dev.completion_cache.clear()
 
     def tearDown(self):
         orchestrator.client = self.original_orchestrator_client
         junior_dev.client = self.original_junior_client
         orchestrator.chat_sessions.clear()
         junior_dev.junior_sessions.clear()
+        junior_dev.completion_cache.clear()
 
     def _plan_payload(self):
         return {
@@ -207,12 +309,302 @@ class AgentFlowTests(unittest.TestCase):
         for code in contents:
             self.assertNotIn("```", code)
 
+        # Per-file transcripts are reachable from the result and cleared with the batch session
+        navbar_session = implementations["file_session_ids"]["src/components/Navbar.tsx"]
+        self.assertIsNotNone(junior_dev.get_session_history(navbar_session))
+        self.assertTrue(junior_dev.clear_session("junior-flow"))
+        self.assertIsNone(junior_dev.get_session_history(navbar_session))
+
         calls = junior_dev.client.chat.completions.calls
         self.assertGreaterEqual(len(calls), 1)
         user_prompt = calls[0]["messages"][-1]["content"]
         self.assertIn("Routes to Implement", user_prompt)
         self.assertIn("/projects", user_prompt)
 
+    def test_same_filename_in_different_paths_keeps_separate_sessions(self):
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+        admin_plan = home_plan.model_copy(update={"path": "src/pages/admin"})
+        junior_dev.client = SequenceClient(["const Home = () => null;", "const AdminHome = () => null;"])
+
+        with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_BATCH_SIZE", 2):
+            self.assertEqual(len(junior_dev.group_for_batching([home_plan, admin_plan], batch_size=2)), 2)
+            result = asyncio.run(junior_dev.implement_multiple_components([home_plan, admin_plan], None, "dupes"))
+
+        self.assertEqual(
+            result["file_session_ids"],
+            {"src/pages/Home.tsx": "dupes:src/pages/Home.tsx", "src/pages/admin/Home.tsx": "dupes:src/pages/admin/Home.tsx"},
+        )
+        for file_session_id in result["file_session_ids"].values():
+            self.assertEqual(len(junior_dev.get_session_history(file_session_id)), 2)
+
+        # Called directly with both, implement_batch implements them one by one
+        junior_dev.completion_cache.clear()
+        junior_dev.client = SequenceClient(["const Home = () => null;", "const AdminHome = () => null;"])
+        results = asyncio.run(junior_dev.implement_batch([home_plan, admin_plan], None, "dupes-batch"))
+        self.assertEqual(len(junior_dev.client.chat.completions.calls), 2)
+        self.assertEqual([r["session_id"] for r in results], ["dupes-batch:src/pages/Home.tsx", "dupes-batch:src/pages/admin/Home.tsx"])
+
+    def test_implement_files_uses_the_given_runner(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        junior_dev.client = SequenceClient(
+            [json.dumps({"files": [
+                {"filename": "Navbar.tsx", "content": "const Navbar = () => null;"},
+                {"filename": "App.tsx", "content": "const App = () => null;"},
+            ]})]
+        )
+        runs = []
+
+        async def run_all(coros):
+            coros = list(coros)
+            runs.append(len(coros))
+            coros[1].close()
+            return [await coros[0], TimeoutError("Timed out after 1s")]
+
+        with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_BATCH_SIZE", 3):
+            results, session_ids = asyncio.run(junior_dev.implement_files(plan.files, None, "runner", run_all))
+
+        # Navbar and App share a batch; Home's batch timed out in the runner
+        self.assertEqual(runs, [2])
+        self.assertEqual([r["filename"] for r in results[:2]], ["Navbar.tsx", "App.tsx"])
+        self.assertIsInstance(results[2], TimeoutError)
+        self.assertEqual(session_ids[0], session_ids[1])
+        self.assertEqual(session_ids[2], "runner:src/pages/Home.tsx")
+
+    def test_implement_batch_splits_files(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        batched_reply = json.dumps(
+            {
+                "files": [
+                    {"filename": "Navbar.tsx", "content": "```tsx\nconst Navbar = () => null;\n```"},
+                    {"filename": "App.tsx", "content": "const App = () => null;"},
+                    {"filename": "Home.tsx", "type": "feedback", "blocking": True, "message": "Need copy"},
+                ]
+            }
+        )
+        junior_dev.client = SequenceClient([batched_reply])
+
+        results = asyncio.run(junior_dev.implement_batch(plan.files, None, session_id="batch"))
+
+        self.assertEqual(len(junior_dev.client.chat.completions.calls), 1)
+        # The three files' estimates combined, capped at JUNIOR_DEV_MAX_TOKENS
+        self.assertEqual(junior_dev.client.chat.completions.calls[0]["max_tokens"], 8000)
+        self.assertEqual([r["filename"] for r in results], ["Navbar.tsx", "App.tsx", "Home.tsx"])
+        self.assertEqual(results[0]["content"], "const Navbar = () => null;")
+        self.assertEqual(results[1]["type"], "implementation")
+        self.assertEqual(results[2]["type"], "feedback")
+        self.assertTrue(results[2]["blocking"])
+
+    def test_small_files_are_grouped_within_token_budget(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        # Estimates: Navbar 3300, App 3700, Home 1900 (two routes each for Navbar and
+        # App); default JUNIOR_DEV_MAX_TOKENS (8000)
+        batches = junior_dev.group_for_batching(plan.files, batch_size=3)
+        self.assertEqual(
+            [[fp.filename for fp in batch] for batch in batches],
+            [["Navbar.tsx", "App.tsx"], ["Home.tsx"]],
+        )
+
+        empty_plans = [
+            FilePlan(path="src", filename=f"Empty{i}.tsx", functions=[], dependencies=[], props="")
+            for i in range(5)
+        ]
+        self.assertEqual([len(batch) for batch in junior_dev.group_for_batching(empty_plans, batch_size=5)], [5])
+
+    def test_offline_batch_job_collects_results(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        # custom_ids are plan indices: 0 Navbar.tsx, 1 App.tsx, 2 Home.tsx
+        junior_dev.client = BatchJobClient(
+            {
+                "0": "```tsx\nconst Navbar = () => null;\n```",
+                "2": '{"type": "feedback", "blocking": true, "message": "Need copy"}',
+            },
+            # App.tsx's line is malformed; it must fail alone, not abort the job
+            extra_lines=[json.dumps({"custom_id": "1", "response": {"body": {"choices": [{"message": {}}]}}}), "{not json"],
+        )
+
+        result = asyncio.run(
+            junior_dev.implement_multiple_components_offline(plan.files, None, "offline", poll_interval=0)
+        )
+
+        uploaded = [json.loads(line) for line in junior_dev.client.uploaded.splitlines()]
+        self.assertEqual([line["custom_id"] for line in uploaded], ["0", "1", "2"])
+        self.assertEqual(junior_dev.client.retrieved, 1)
+        self.assertEqual(result["successful"], 2)
+        self.assertEqual(result["implementations"][0]["content"], "const Navbar = () => null;")
+        self.assertEqual(result["implementations"][1]["type"], "feedback")
+        self.assertEqual(result["errors"], [{"filename": "App.tsx", "error": "File missing from batch output"}])
+
+    def test_offline_batch_job_reports_failed_requests(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        # Every request failed, so the job has an error file and no output file
+        junior_dev.client = BatchJobClient(
+            {},
+            error_lines=[
+                {"custom_id": "0", "response": None, "error": {"code": "invalid_request", "message": "Bad model"}},
+                {
+                    "custom_id": "1",
+                    "response": {"status_code": 429, "body": {"error": {"message": "Rate limit reached"}}},
+                    "error": None,
+                },
+                {"custom_id": "2", "response": {"status_code": 500, "body": {}}, "error": None},
+            ],
+        )
+
+        result = asyncio.run(
+            junior_dev.implement_multiple_components_offline(plan.files, None, "offline-errors", poll_interval=0)
+        )
+
+        self.assertEqual(
+            result["errors"],
+            [
+                {"filename": "Navbar.tsx", "error": "Batch request failed: Bad model"},
+                {"filename": "App.tsx", "error": "Batch request failed with status 429: Rate limit reached"},
+                {"filename": "Home.tsx", "error": "Batch request failed with status 500"},
+            ],
+        )
+
+    def test_batch_fallback_sessions_are_tracked_and_cleared(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        junior_dev.client = SequenceClient(
+            ["not json", "const Navbar = () => null;", "const App = () => null;", "const Home = () => null;"]
+        )
+
+        # Room for all three files in one batch, so the replies are consumed in order
+        with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_BATCH_SIZE", 3), \
+                mock.patch.object(junior_dev.settings, "JUNIOR_DEV_MAX_TOKENS", 10000):
+            result = asyncio.run(junior_dev.implement_multiple_components(plan.files, None, "fallback"))
+
+        self.assertEqual(result["successful"], 3)
+        for filename, file_session_id in result["file_session_ids"].items():
+            self.assertTrue(file_session_id.startswith("fallback:"))
+            self.assertIsNotNone(junior_dev.get_session_history(file_session_id), filename)
+        self.assertTrue(junior_dev.clear_session("fallback"))
+        self.assertEqual(len(junior_dev.junior_sessions), 0)
+
+    def test_implement_batch_reports_malformed_entries_per_file(self):
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+        batched_reply = json.dumps(
+            {
+                "files": [
+                    {"filename": "Navbar.tsx", "content": None},
+                    {"filename": ["App.tsx"], "content": "const App = () => null;"},
+                    {"filename": "Home.tsx", "content": "const Home = () => null;"},
+                ]
+            }
+        )
+        junior_dev.client = SequenceClient([batched_reply])
+
+        results = asyncio.run(junior_dev.implement_batch(plan.files, None, session_id="batch-bad"))
+
+        self.assertEqual([r["type"] for r in results], ["error", "error", "implementation"])
+        self.assertEqual(results[2]["content"], "const Home = () => null;")
+
+    def test_junior_calls_run_concurrently(self):
+        delay = 0.3
+        junior_dev.client = SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions(delay)))
+        plan = orchestrator.OrchestrationPlan(**self._plan_payload())
+
+        async def run_all():
+            return await asyncio.gather(
+                *(junior_dev.implement_component(fp, None, f"concurrency-{idx}") for idx, fp in enumerate(plan.files)),
+                return_exceptions=True,
+            )
+
+        started = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(r["type"] == "implementation" for r in results))
+        # Wall-clock should track the slowest call, not the sum of all calls
+        self.assertLess(elapsed, delay * (len(plan.files) - 1))
+
+    def test_identical_junior_request_is_served_from_cache(self):
+        junior_dev.client = SequenceClient(["const Home = () => null;"])
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        first = asyncio.run(junior_dev.implement_component(home_plan, None, "cache-a"))
+        second = asyncio.run(junior_dev.implement_component(home_plan, None, "cache-b"))
+
+        self.assertEqual(len(junior_dev.client.chat.completions.calls), 1)
+        # One function and no dependencies: the per-file floor
+        self.assertEqual(junior_dev.client.chat.completions.calls[0]["max_tokens"], junior_dev.MIN_FILE_TOKENS)
+        self.assertEqual(second["content"], first["content"])
+        self.assertEqual(second["session_id"], "cache-b")
+        self.assertNotIn("cache_key", first)
+
+    def test_concurrent_identical_requests_share_one_call(self):
+        junior_dev.client = SequenceClient(["const Home = () => null;"])
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        async def run_both():
+            return await asyncio.gather(
+                junior_dev.implement_component(home_plan, None, "flight-a"),
+                junior_dev.implement_component(home_plan, None, "flight-b"),
+            )
+
+        first, second = asyncio.run(run_both())
+
+        self.assertEqual(len(junior_dev.client.chat.completions.calls), 1)
+        self.assertEqual(first["content"], "const Home = () => null;")
+        self.assertEqual(second["content"], first["content"])
+        self.assertEqual(second["session_id"], "flight-b")
+        self.assertEqual(junior_dev._inflight_completions, {})
+
+    def test_caller_after_cancelled_waiter_gets_fresh_call(self):
+        completions = SlowCompletions(0.2)
+        junior_dev.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        async def cancel_then_rejoin():
+            first = asyncio.create_task(junior_dev.implement_component(home_plan, None, "rejoin-a"))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            # Joins immediately, before the cancelled call has finished unwinding
+            second = asyncio.create_task(junior_dev.implement_component(home_plan, None, "rejoin-b"))
+            await asyncio.gather(first, return_exceptions=True)
+            return await second
+
+        result = asyncio.run(cancel_then_rejoin())
+
+        self.assertEqual(result["type"], "implementation")
+        self.assertEqual(result["session_id"], "rejoin-b")
+
+    def test_truncated_reply_is_an_error_and_not_cached(self):
+        junior_dev.client = SimpleNamespace(chat=SimpleNamespace(completions=TruncatedCompletions()))
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        for stream in (False, True):
+            with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_STREAM", stream):
+                result = asyncio.run(junior_dev.implement_component(home_plan, None, f"truncated-{stream}"))
+            self.assertEqual(result["type"], "error")
+            self.assertIn("max_tokens", result["content"])
+        self.assertEqual(len(junior_dev.completion_cache), 0)
+
+    def test_long_reply_for_small_plan_is_retried_at_max_tokens(self):
+        long_page = "const Home = () => (\n" + "  <section className=\"p-4\">...</section>\n" * 400 + ");"
+        completions = BudgetedCompletions(long_page, max_tokens_needed=6000)
+        junior_dev.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_MAX_TOKENS", 8000):
+            result = asyncio.run(junior_dev.implement_component(home_plan, None, "long-page"))
+
+        self.assertEqual([call["max_tokens"] for call in completions.calls], [junior_dev.MIN_FILE_TOKENS, 8000])
+        self.assertEqual(result["type"], "implementation")
+        self.assertEqual(result["content"], long_page)
+
+    def test_streamed_reply_is_assembled(self):
+        completions = StreamingCompletions(["```tsx\nconst Home = ", "() => null;", "\n```"])
+        junior_dev.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        home_plan = orchestrator.OrchestrationPlan(**self._plan_payload()).files[2]
+
+        with mock.patch.object(junior_dev.settings, "JUNIOR_DEV_STREAM", True):
+            result = asyncio.run(junior_dev.implement_component(home_plan, None, "stream"))
+
+        self.assertTrue(completions.calls[0]["stream"])
+        self.assertEqual(result["type"], "implementation")
+        self.assertEqual(result["content"], "const Home = () => null;")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from fastapi.responses import FileResponse
+
+from app.services.response_cache import ZipResponseCache
+
+
+class ZipResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache = ZipResponseCache(max_entries=2, ttl_seconds=60, cache_dir=self.root / "cache")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _response(self, name):
+        zip_path = self.root / f"{name}.zip"
+        zip_path.write_bytes(name.encode("utf-8"))
+        return FileResponse(
+            path=str(zip_path),
+            headers={"X-Failed-Files": "0", "X-Documentation-URL": "http://localhost:5173"},
+        )
+
+    def test_stored_zip_is_served_with_its_headers(self):
+        stored = asyncio.run(self.cache.store("a", self._response("a")))
+        cached = asyncio.run(self.cache.get("a"))
+
+        self.assertEqual(Path(cached.path).read_bytes(), b"a")
+        self.assertEqual(cached.path, stored.path)
+        self.assertEqual(cached.headers["x-failed-files"], "0")
+        # The dev server URL belongs to the request that started it
+        self.assertEqual(stored.headers["x-documentation-url"], "http://localhost:5173")
+        self.assertNotIn("x-documentation-url", cached.headers)
+        self.assertIsNone(asyncio.run(self.cache.get("missing")))
+
+    def _sent(self, response):
+        """Run the response's background task, as Starlette does after sending it."""
+        asyncio.run(response.background())
+        return response
+
+    def test_identical_requests_get_separate_files(self):
+        first = self._sent(asyncio.run(self.cache.store("a", self._response("a"))))
+        second = asyncio.run(self.cache.store("a", self._response("a")))
+
+        self.assertNotEqual(first.path, second.path)
+        self.assertFalse(Path(first.path).exists())
+        self.assertEqual(asyncio.run(self.cache.get("a")).path, second.path)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self._sent(asyncio.run(self.cache.store("a", self._response("a"))))
+        evicted_path = Path(self._sent(asyncio.run(self.cache.store("b", self._response("b")))).path)
+        self._sent(asyncio.run(self.cache.get("a")))
+        self._sent(asyncio.run(self.cache.store("c", self._response("c"))))
+
+        self.assertIsNone(asyncio.run(self.cache.get("b")))
+        self.assertFalse(evicted_path.exists())
+        self.assertIsNotNone(asyncio.run(self.cache.get("a")))
+        self.assertIsNotNone(asyncio.run(self.cache.get("c")))
+
+    def test_evicted_zip_outlives_unsent_response(self):
+        pending = asyncio.run(self.cache.store("a", self._response("a")))
+        later = time.monotonic() + 61
+        with mock.patch("app.services.response_cache.time.monotonic", return_value=later):
+            self.assertIsNone(asyncio.run(self.cache.get("a")))
+
+        self.assertEqual(Path(pending.path).read_bytes(), b"a")
+        self._sent(pending)
+        self.assertFalse(Path(pending.path).exists())
+
+    def test_expired_entry_is_dropped(self):
+        stored = self._sent(asyncio.run(self.cache.store("a", self._response("a"))))
+        later = time.monotonic() + 61
+        with mock.patch("app.services.response_cache.time.monotonic", return_value=later):
+            self.assertIsNone(asyncio.run(self.cache.get("a")))
+        self.assertFalse(Path(stored.path).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest import mock
+
+from app.core.session_store import SessionStore
+
+
+class SessionStoreTests(unittest.TestCase):
+    def test_transcript_is_trimmed_to_max_turns(self):
+        store = SessionStore(max_sessions=10, ttl_seconds=60, max_turns=2)
+        for turn in range(3):
+            store.append_turn("s", f"request {turn}", f"reply {turn}")
+
+        self.assertEqual([m["content"] for m in store["s"]], ["request 1", "reply 1", "request 2", "reply 2"])
+
+    def test_zero_max_turns_keeps_no_history(self):
+        store = SessionStore(max_sessions=10, ttl_seconds=60, max_turns=0)
+        store.append_turn("s", "request", "reply")
+
+        self.assertNotIn("s", store)
+        self.assertEqual(len(store), 0)
+
+    def test_reads_refresh_recency(self):
+        store = SessionStore(max_sessions=2, ttl_seconds=60, max_turns=2)
+        store.append_turn("read", "request", "reply")
+        store.append_turn("idle", "request", "reply")
+        store.get("read")
+        store.append_turn("new", "request", "reply")
+
+        self.assertIn("read", store)
+        self.assertNotIn("idle", store)
+
+    def test_reads_refresh_idle_ttl(self):
+        store = SessionStore(max_sessions=10, ttl_seconds=60, max_turns=2)
+        with mock.patch("app.core.session_store.time.monotonic", return_value=1000.0):
+            store.append_turn("s", "request", "reply")
+        with mock.patch("app.core.session_store.time.monotonic", return_value=1050.0):
+            self.assertIn("s", store)
+        with mock.patch("app.core.session_store.time.monotonic", return_value=1100.0):
+            self.assertIn("s", store)
+        with mock.patch("app.core.session_store.time.monotonic", return_value=1161.0):
+            self.assertNotIn("s", store)
+
+
+if __name__ == "__main__":
+    unittest.main()
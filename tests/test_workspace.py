@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app.services import workspace
+
+
+class FastCopytreeTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.src = self.root / "template"
+        (self.src / "src").mkdir(parents=True)
+        (self.src / "src" / "main.tsx").write_text("template")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _copy(self, dst, **kwargs):
+        # No reflinks, so the hardlink/copy fallbacks are what gets exercised
+        with mock.patch.object(workspace, "fcntl", None):
+            workspace.fast_copytree(self.src, dst, **kwargs)
+        return dst / "src" / "main.tsx"
+
+    def test_default_copy_is_independent_of_the_template(self):
+        copied = self._copy(self.root / "persistent")
+        copied.write_text("edited in place")
+
+        self.assertEqual((self.src / "src" / "main.tsx").read_text(), "template")
+
+    @unittest.skipUnless(hasattr(os, "link"), "hardlinks not supported")
+    def test_hardlink_copy_shares_the_template_inode(self):
+        copied = self._copy(self.root / "workspace", hardlink=True)
+
+        self.assertTrue(os.path.samefile(copied, self.src / "src" / "main.tsx"))
+
+
+if __name__ == "__main__":
+    unittest.main()